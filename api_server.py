@@ -0,0 +1,228 @@
+import argparse
+import json
+import math
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from prediction_service import get_service, watch_for_new_models
+
+
+class ServerMetrics:
+    # Request latencies (last N) and a power-of-two histogram of batch sizes
+
+    def __init__(self, window=10_000):
+        self._latencies = deque(maxlen=window)
+        self._batch_sizes = Counter()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.batches = 0
+
+    def observe_request(self, seconds, ok=True):
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self._latencies.append(seconds)
+
+    def observe_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def observe_batch(self, size):
+        bucket = 1 << (size - 1).bit_length()
+        with self._lock:
+            self.batches += 1
+            self._batch_sizes[bucket] += 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self._latencies)
+            histogram = {f"<={size}": count for size, count in sorted(self._batch_sizes.items())}
+            snapshot = {
+                "requests": self.requests,
+                "errors": self.errors,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "batch_size_histogram": histogram,
+            }
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1e3
+            snapshot["latency_ms"] = {"p50": p50, "p90": p90, "p99": p99, "max": latencies.max() * 1e3}
+        return snapshot
+
+
+class MicroBatcher:
+    # Collects concurrent requests for up to `window` seconds (or max_batch rows)
+    # and scores them with a single vectorized prediction call
+
+    def __init__(self, metrics, window=0.005, max_batch=512):
+        self.metrics = metrics
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        future = Future()
+        self._queue.put((records, future))
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.window
+        while rows < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            records = [record for pending, _ in batch for record in pending]
+            try:
+                results = get_service().evaluate(records)
+            except Exception:
+                # Score each request on its own so only the one that caused the error fails
+                for pending, future in batch:
+                    try:
+                        future.set_result(get_service().evaluate(pending))
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+
+            self.metrics.observe_batch(len(records))
+            start = 0
+            for pending, future in batch:
+                future.set_result(results[start:start + len(pending)])
+                start += len(pending)
+
+
+def validate_records(records, feature_cols):
+    if not isinstance(records, list) or not records:
+        raise ValueError("'records' must be a non-empty list")
+    allowed = set(feature_cols)
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"Record {i} must be an object")
+        unknown = set(record) - allowed
+        if unknown:
+            raise ValueError(f"Record {i} has unknown features: {', '.join(sorted(unknown))}")
+        for col, value in record.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Record {i}: {col} must be a number")
+            # json.loads accepts NaN and Infinity
+            if not math.isfinite(value):
+                raise ValueError(f"Record {i}: {col} must be a finite number")
+
+
+def parse_payload(payload, feature_cols):
+    # A bare record is a single prediction; {"records": [...]} is a batch
+    if isinstance(payload, dict) and "records" in payload:
+        records = payload["records"]
+        validate_records(records, feature_cols)
+        return records, False
+    validate_records([payload], feature_cols)
+    return [payload], True
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    batcher = None
+    metrics = None
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send_json(200, self.metrics.snapshot())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok", "model_version": get_service().version})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            records, single = parse_payload(payload, get_service().feature_cols)
+        except ValueError as e:
+            self.metrics.observe_request(time.perf_counter() - start, ok=False)
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            results = self.batcher.submit(records)
+        except Exception as e:
+            self.metrics.observe_request(time.perf_counter() - start, ok=False)
+            self._send_json(500, {"error": str(e)})
+            return
+
+        self.metrics.observe_request(time.perf_counter() - start)
+        self._send_json(200, results[0] if single else {"results": results})
+
+    def log_message(self, format, *args):
+        # Keep stdout quiet under load; /metrics has the numbers
+        pass
+
+
+class PredictionServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 resets connections under concurrent load
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve exam score predictions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--window-ms", type=float, default=5.0, help="Micro-batching window (default: 5 ms)")
+    parser.add_argument("--max-batch", type=int, default=512, help="Maximum rows per model call (default: 512)")
+    args = parser.parse_args()
+
+    # Load the model before accepting connections, then follow the registry's active version
+    get_service()
+    watch_for_new_models()
+
+    metrics = ServerMetrics()
+    PredictionHandler.metrics = metrics
+    PredictionHandler.batcher = MicroBatcher(metrics, args.window_ms / 1e3, args.max_batch)
+
+    server = PredictionServer((args.host, args.port), PredictionHandler)
+    print(f"Serving predictions on http://{args.host}:{args.port} (POST /predict, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
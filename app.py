@@ -1,6 +1,12 @@
 import streamlit as st
-import pandas as pd
-import joblib
+
+from audit_log import log_prediction
+from instrumentation import timings
+from prediction_service import get_schema, get_service, warm_up_in_background
+from ui_components import show_attributions, show_sidebar_panels, show_what_if
+
+# Per-stage timings of this rerun (recorded only when instrumentation is on)
+lap = timings.lap()
 
 # Page configuration
 st.set_page_config(
@@ -70,23 +76,13 @@ with col_nav2:
 if 'page' not in st.session_state:
     st.session_state.page = "english"
 
-# Load model and dataset
-@st.cache_resource
-def load_model():
-    return joblib.load("model.pkl")
-
-@st.cache_data
-def load_dataset():
-    return pd.read_csv("merged_dataset.csv")
-
-model = load_model()
-df = load_dataset()
-target_col = "ExamScore"
-feature_cols = df.drop([target_col, "FinalGrade"], axis=1).columns.tolist()
+lap.done("rerun.layout")
 
-# Helper function
-def get_unique_values(series):
-    return sorted(series.unique().tolist())
+# Build the form from the small feature schema; the model loads in the background
+# while the form is being filled in and is only required on submit
+columns = get_schema()["columns"]
+warm_up_in_background()
+lap.done("rerun.schema")
 
 # Main content
 if st.session_state.page == "kurdish":
@@ -101,6 +97,17 @@ if st.session_state.page == "kurdish":
         "yes_no": {0: "نەخێر", 1: "بەڵێ"},
         "resource": {0: "نزم", 1: "مامناوەند", 2: "بەرز"},
         "stress": {0: "نزم", 1: "مامناوەند", 2: "بەرز"},
+        "attributions": {
+            "title": "🔍 بۆچی ئەم نمرەیە؟",
+            "caption": "لە تێکڕای پێشبینی {bias:.2f}ەوە، هەر ستوونێک نیشان دەدات هەر هۆکارێک چەندە نمرەکەی بەرز یان نزم کردووەتەوە.",
+            "axis": "خاڵی زیادکراو بۆ نمرە",
+        },
+        "what_if": {
+            "title": "### 📈 ئەگەر چی ببێت؟",
+            "caption": "نمرەی پێشبینیکراو کاتێک تەنها یەک هۆکار دەگۆڕێت و هەموو ئەوانی تر وەک خۆیان دەمێننەوە.",
+            "score": "نمرەی پێشبینیکراو",
+            "current": "بەهای ئێستا: {value:g}",
+        }
     }
     
     user_data = {}
@@ -121,9 +128,9 @@ if st.session_state.page == "kurdish":
             
             user_data['Age'] = st.number_input(
                 "تەمەن:",
-                min_value=int(df['Age'].min()),
-                max_value=int(df['Age'].max()),
-                value=int(df['Age'].mean()),
+                min_value=columns['Age']['min'],
+                max_value=columns['Age']['max'],
+                value=int(columns['Age']['mean']),
                 step=1,
                 key="age_kur"
             )
@@ -131,7 +138,7 @@ if st.session_state.page == "kurdish":
         with col2:
             learning_style_selected = st.selectbox(
                 "شێوازی فێربوون:",
-                options=get_unique_values(df['LearningStyle']),
+                options=columns['LearningStyle']['values'],
                 format_func=lambda x: translations["learning_style"].get(x, f"شێواز {x}"),
                 key="learning_style_kur"
             )
@@ -139,7 +146,7 @@ if st.session_state.page == "kurdish":
             
             motivation_selected = st.selectbox(
                 "ئاستی هاندان:",
-                options=get_unique_values(df['Motivation']),
+                options=columns['Motivation']['values'],
                 format_func=lambda x: translations["motivation"].get(x, f"ئاست {x}"),
                 key="motivation_kur"
             )
@@ -154,27 +161,27 @@ if st.session_state.page == "kurdish":
         with col3:
             user_data['StudyHours'] = st.number_input(
                 "کاتژمێرەکانی خوێندن لە هەفتەیەکدا:",
-                min_value=int(df['StudyHours'].min()),
-                max_value=int(df['StudyHours'].max()),
-                value=int(df['StudyHours'].mean()),
+                min_value=columns['StudyHours']['min'],
+                max_value=columns['StudyHours']['max'],
+                value=int(columns['StudyHours']['mean']),
                 step=1,
                 key="study_hours_kur"
             )
             
             user_data['Attendance'] = st.number_input(
                 "ڕێژەی بەشداریکردن (%):",
-                min_value=int(df['Attendance'].min()),
-                max_value=int(df['Attendance'].max()),
-                value=int(df['Attendance'].mean()),
+                min_value=columns['Attendance']['min'],
+                max_value=columns['Attendance']['max'],
+                value=int(columns['Attendance']['mean']),
                 step=1,
                 key="attendance_kur"
             )
             
             user_data['AssignmentCompletion'] = st.number_input(
                 "ڕێژەی تەواوکردنی ئەرکەکان (%):",
-                min_value=int(df['AssignmentCompletion'].min()),
-                max_value=int(df['AssignmentCompletion'].max()),
-                value=int(df['AssignmentCompletion'].mean()),
+                min_value=columns['AssignmentCompletion']['min'],
+                max_value=columns['AssignmentCompletion']['max'],
+                value=int(columns['AssignmentCompletion']['mean']),
                 step=1,
                 key="assignment_kur"
             )
@@ -182,16 +189,16 @@ if st.session_state.page == "kurdish":
         with col4:
             user_data['OnlineCourses'] = st.number_input(
                 "ژمارەی کۆرسە ئۆنلاینەکان:",
-                min_value=int(df['OnlineCourses'].min()),
-                max_value=int(df['OnlineCourses'].max()),
-                value=int(df['OnlineCourses'].mean()),
+                min_value=columns['OnlineCourses']['min'],
+                max_value=columns['OnlineCourses']['max'],
+                value=int(columns['OnlineCourses']['mean']),
                 step=1,
                 key="online_courses_kur"
             )
             
             discussion_selected = st.selectbox(
                 "بەشداری لە گفتوگۆکاندا:",
-                options=get_unique_values(df['Discussions']),
+                options=columns['Discussions']['values'],
                 format_func=lambda x: translations["yes_no"].get(x, "نەزانراو"),
                 key="discussions_kur"
             )
@@ -199,7 +206,7 @@ if st.session_state.page == "kurdish":
             
             extracurricular_selected = st.selectbox(
                 "بەشداری لە چالاکییەکانی دەرەوە:",
-                options=get_unique_values(df['Extracurricular']),
+                options=columns['Extracurricular']['values'],
                 format_func=lambda x: translations["yes_no"].get(x, "نەزانراو"),
                 key="extracurricular_kur"
             )
@@ -214,7 +221,7 @@ if st.session_state.page == "kurdish":
         with col5:
             resource_selected = st.selectbox(
                 "ئاستی دەستگەیشتن بە سەرچاوەکان:",
-                options=get_unique_values(df['Resources']),
+                options=columns['Resources']['values'],
                 format_func=lambda x: translations["resource"].get(x, f"ئاست {x}"),
                 key="resources_kur"
             )
@@ -222,7 +229,7 @@ if st.session_state.page == "kurdish":
             
             internet_selected = st.selectbox(
                 "دەستگەیشتن بە ئینتەرنێت:",
-                options=get_unique_values(df['Internet']),
+                options=columns['Internet']['values'],
                 format_func=lambda x: translations["yes_no"].get(x, "نەزانراو"),
                 key="internet_kur"
             )
@@ -231,7 +238,7 @@ if st.session_state.page == "kurdish":
         with col6:
             edutech_selected = st.selectbox(
                 "بەکارهێنانی تەکنەلۆژیای پەروەردەیی:",
-                options=get_unique_values(df['EduTech']),
+                options=columns['EduTech']['values'],
                 format_func=lambda x: translations["yes_no"].get(x, "نەزانراو"),
                 key="edutech_kur"
             )
@@ -239,49 +246,35 @@ if st.session_state.page == "kurdish":
             
             stress_selected = st.selectbox(
                 "ئاستی فشاری دەروونی:",
-                options=get_unique_values(df['StressLevel']),
+                options=columns['StressLevel']['values'],
                 format_func=lambda x: translations["stress"].get(x, f"ئاست {x}"),
                 key="stress_kur"
             )
             user_data['StressLevel'] = stress_selected
         
+        what_if = st.checkbox("📈 پیشاندانی شیکاری ئەگەر (what-if)", key="what_if_kur")
         submitted = st.form_submit_button("🔮 پێشبینی نمرەی تاقیکردنەوە", use_container_width=True, type="primary")
     
+    lap.done("rerun.form")
     if submitted:
         try:
-            # Convert input to DataFrame
-            input_df = pd.DataFrame([user_data])
-            
-            # Ensure all expected columns are present
-            for col in feature_cols:
-                if col not in input_df.columns:
-                    input_df[col] = df[col].mean()
-            
-            # Reorder columns to match model expectations
-            input_df = input_df[feature_cols]
-            
-            # Make prediction
-            prediction = model.predict(input_df)[0]
-            exam_score = round(prediction, 2)
-            
-            # Determine performance level
-            if exam_score >= 90:
-                level = "نایاب"
-            elif exam_score >= 80:
-                level = "زۆر باش"
-            elif exam_score >= 70:
-                level = "باش"
-            elif exam_score >= 60:
-                level = "مامناوەند"
-            else:
-                level = "پێویستی بە باشترکردن هەیە"
-            
-            pass_status = "تێپەڕ" if exam_score >= 60 else "شکست"
+            # Predict through the shared service (fills missing columns with training means)
+            service = get_service()
+            result = service.evaluate([user_data], language="ku")[0]
+            log_prediction(service, user_data, result, "app_kurdish")
+            lap.done("rerun.predict")
+            exam_score = result["score"]
+            level = result["level"]
+            pass_status = result["status"]
             
             # Display result
             st.success(f"### 🎯 ئەنجامی پێشبینی")
             st.metric("نمرە", f"{exam_score:.2f}", "لە ١٠٠")
             st.info(f"**ئاست:** {level} | **دۆخ:** {pass_status}")
+            show_attributions(service.explain([user_data])[0], translations["attributions"])
+            if what_if:
+                show_what_if(service, user_data, translations["what_if"])
+            lap.done("rerun.render")
             
         except Exception as e:
             st.error(f"❌ هەڵە: {str(e)}")
@@ -310,9 +303,9 @@ else:
             
             user_data['Age'] = st.number_input(
                 "Age:",
-                min_value=int(df['Age'].min()),
-                max_value=int(df['Age'].max()),
-                value=int(df['Age'].mean()),
+                min_value=columns['Age']['min'],
+                max_value=columns['Age']['max'],
+                value=int(columns['Age']['mean']),
                 step=1,
                 key="age"
             )
@@ -321,7 +314,7 @@ else:
             learning_style_options = {0: "Visual", 1: "Auditory", 2: "Kinesthetic", 3: "Reading/Writing"}
             learning_style_selected = st.selectbox(
                 "Learning Style:",
-                options=get_unique_values(df['LearningStyle']),
+                options=columns['LearningStyle']['values'],
                 format_func=lambda x: learning_style_options.get(x, f"Style {x}"),
                 key="learning_style"
             )
@@ -330,7 +323,7 @@ else:
             motivation_options = {0: "Low", 1: "Medium", 2: "High"}
             motivation_selected = st.selectbox(
                 "Motivation Level:",
-                options=get_unique_values(df['Motivation']),
+                options=columns['Motivation']['values'],
                 format_func=lambda x: motivation_options.get(x, f"Level {x}"),
                 key="motivation"
             )
@@ -345,27 +338,27 @@ else:
         with col3:
             user_data['StudyHours'] = st.number_input(
                 "Study Hours per Week:",
-                min_value=int(df['StudyHours'].min()),
-                max_value=int(df['StudyHours'].max()),
-                value=int(df['StudyHours'].mean()),
+                min_value=columns['StudyHours']['min'],
+                max_value=columns['StudyHours']['max'],
+                value=int(columns['StudyHours']['mean']),
                 step=1,
                 key="study_hours"
             )
             
             user_data['Attendance'] = st.number_input(
                 "Attendance Rate (%):",
-                min_value=int(df['Attendance'].min()),
-                max_value=int(df['Attendance'].max()),
-                value=int(df['Attendance'].mean()),
+                min_value=columns['Attendance']['min'],
+                max_value=columns['Attendance']['max'],
+                value=int(columns['Attendance']['mean']),
                 step=1,
                 key="attendance"
             )
             
             user_data['AssignmentCompletion'] = st.number_input(
                 "Assignment Completion Rate (%):",
-                min_value=int(df['AssignmentCompletion'].min()),
-                max_value=int(df['AssignmentCompletion'].max()),
-                value=int(df['AssignmentCompletion'].mean()),
+                min_value=columns['AssignmentCompletion']['min'],
+                max_value=columns['AssignmentCompletion']['max'],
+                value=int(columns['AssignmentCompletion']['mean']),
                 step=1,
                 key="assignment"
             )
@@ -373,9 +366,9 @@ else:
         with col4:
             user_data['OnlineCourses'] = st.number_input(
                 "Number of Online Courses:",
-                min_value=int(df['OnlineCourses'].min()),
-                max_value=int(df['OnlineCourses'].max()),
-                value=int(df['OnlineCourses'].mean()),
+                min_value=columns['OnlineCourses']['min'],
+                max_value=columns['OnlineCourses']['max'],
+                value=int(columns['OnlineCourses']['mean']),
                 step=1,
                 key="online_courses"
             )
@@ -383,7 +376,7 @@ else:
             discussion_options = {0: "No", 1: "Yes"}
             discussion_selected = st.selectbox(
                 "Participate in Discussions:",
-                options=get_unique_values(df['Discussions']),
+                options=columns['Discussions']['values'],
                 format_func=lambda x: discussion_options.get(x, "Unknown"),
                 key="discussions"
             )
@@ -392,7 +385,7 @@ else:
             extracurricular_options = {0: "No", 1: "Yes"}
             extracurricular_selected = st.selectbox(
                 "Extracurricular Activities:",
-                options=get_unique_values(df['Extracurricular']),
+                options=columns['Extracurricular']['values'],
                 format_func=lambda x: extracurricular_options.get(x, "Unknown"),
                 key="extracurricular"
             )
@@ -408,7 +401,7 @@ else:
             resource_options = {0: "Low", 1: "Medium", 2: "High"}
             resource_selected = st.selectbox(
                 "Resource Access Level:",
-                options=get_unique_values(df['Resources']),
+                options=columns['Resources']['values'],
                 format_func=lambda x: resource_options.get(x, f"Level {x}"),
                 key="resources"
             )
@@ -417,7 +410,7 @@ else:
             internet_options = {0: "No", 1: "Yes"}
             internet_selected = st.selectbox(
                 "Internet Access:",
-                options=get_unique_values(df['Internet']),
+                options=columns['Internet']['values'],
                 format_func=lambda x: internet_options.get(x, "Unknown"),
                 key="internet"
             )
@@ -427,7 +420,7 @@ else:
             edutech_options = {0: "No", 1: "Yes"}
             edutech_selected = st.selectbox(
                 "Use Educational Technology:",
-                options=get_unique_values(df['EduTech']),
+                options=columns['EduTech']['values'],
                 format_func=lambda x: edutech_options.get(x, "Unknown"),
                 key="edutech"
             )
@@ -436,50 +429,50 @@ else:
             stress_options = {0: "Low", 1: "Medium", 2: "High"}
             stress_selected = st.selectbox(
                 "Stress Level:",
-                options=get_unique_values(df['StressLevel']),
+                options=columns['StressLevel']['values'],
                 format_func=lambda x: stress_options.get(x, f"Level {x}"),
                 key="stress"
             )
             user_data['StressLevel'] = stress_selected
         
+        what_if = st.checkbox("📈 Show what-if analysis", key="what_if")
         submitted = st.form_submit_button("🔮 Predict Exam Score", use_container_width=True, type="primary")
     
+    lap.done("rerun.form")
     if submitted:
         try:
-            # Convert input to DataFrame
-            input_df = pd.DataFrame([user_data])
-            
-            # Ensure all expected columns are present
-            for col in feature_cols:
-                if col not in input_df.columns:
-                    input_df[col] = df[col].mean()
-            
-            # Reorder columns to match model expectations
-            input_df = input_df[feature_cols]
-            
-            # Make prediction
-            prediction = model.predict(input_df)[0]
-            exam_score = round(prediction, 2)
-            
-            # Determine performance level
-            if exam_score >= 90:
-                level = "Excellent"
-            elif exam_score >= 80:
-                level = "Very Good"
-            elif exam_score >= 70:
-                level = "Good"
-            elif exam_score >= 60:
-                level = "Average"
-            else:
-                level = "Needs Improvement"
-            
-            pass_status = "Pass" if exam_score >= 60 else "Fail"
+            # Predict through the shared service (fills missing columns with training means)
+            service = get_service()
+            result = service.evaluate([user_data])[0]
+            log_prediction(service, user_data, result, "app")
+            lap.done("rerun.predict")
+            exam_score = result["score"]
+            level = result["level"]
+            pass_status = result["status"]
             
             # Display result
             st.success(f"### 🎯 Prediction Result")
             st.metric("Exam Score", f"{exam_score:.2f}", "out of 100")
             st.info(f"**Level:** {level} | **Status:** {pass_status}")
+            show_attributions(service.explain([user_data])[0], {
+                "title": "🔍 Why this score?",
+                "caption": "Starting from the average prediction of {bias:.2f}, each bar shows how much a factor raised or lowered this student's score.",
+                "axis": "Points added to the score",
+            })
+            if what_if:
+                show_what_if(service, user_data, {
+                    "title": "### 📈 What if?",
+                    "caption": "Predicted score when one factor changes and everything else stays as entered.",
+                    "score": "Predicted score",
+                    "current": "Current value: {value:g}",
+                })
+            lap.done("rerun.render")
             
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
             st.info("Please make sure all fields are filled correctly.")
+
+# Prediction cache counters and admin timings in the sidebar
+show_sidebar_panels()
+
+lap.total("rerun.total")
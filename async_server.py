@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import json
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from api_server import ServerMetrics, parse_payload
+from prediction_service import get_service, watch_for_new_models
+from schema import load_schema
+
+MAX_BODY_BYTES = 1 << 20
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+           429: "Too Many Requests", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+# Runs inside the pool workers: each worker holds its own warm copy of the model
+# and swaps in newly activated versions on its own
+def _init_worker():
+    get_service()
+    watch_for_new_models()
+
+
+def _evaluate(records):
+    return get_service().evaluate(records)
+
+
+class AsyncBatcher:
+    # Collects requests for up to `window` seconds and hands each batch to the
+    # process pool, keeping at most `max_batches` batches in flight
+
+    def __init__(self, pool, metrics, window, max_batch, max_batches):
+        self.pool = pool
+        self.metrics = metrics
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_batches)
+        self._tasks = set()
+
+    async def submit(self, records):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.window
+        while rows < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    async def run(self):
+        while True:
+            batch = await self._collect()
+            await self._slots.acquire()
+            task = asyncio.create_task(self._score(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, batch):
+        records = [record for pending, _ in batch for record in pending]
+        loop = asyncio.get_running_loop()
+        try:
+            try:
+                results = await loop.run_in_executor(self.pool, _evaluate, records)
+            except Exception:
+                # Score each request on its own so only the one that caused the error fails
+                for pending, future in batch:
+                    try:
+                        result = await loop.run_in_executor(self.pool, _evaluate, pending)
+                    except Exception as e:
+                        if not future.done():
+                            future.set_exception(e)
+                    else:
+                        if not future.done():
+                            future.set_result(result)
+                return
+        finally:
+            self._slots.release()
+
+        self.metrics.observe_batch(len(records))
+        start = 0
+        for pending, future in batch:
+            if not future.done():
+                future.set_result(results[start:start + len(pending)])
+            start += len(pending)
+
+
+class AsyncPredictionServer:
+    def __init__(self, batcher, metrics, feature_cols, max_pending):
+        self.batcher = batcher
+        self.metrics = metrics
+        self.feature_cols = feature_cols
+        self.max_pending = max_pending
+        self.pending = 0
+        self.draining = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length)
+
+                status, response = await self.dispatch(method, path, body)
+                keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                              and not self.draining)
+                await self._respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, body, keep_alive):
+        data = json.dumps(body).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {REASONS[status]}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(data)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 429:
+            head.append("Retry-After: 1")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+        await writer.drain()
+
+    async def dispatch(self, method, path, body):
+        if method == "GET" and path == "/metrics":
+            snapshot = self.metrics.snapshot()
+            snapshot["pending"] = self.pending
+            return 200, snapshot
+        if method == "GET" and path == "/health":
+            return (503, {"status": "draining"}) if self.draining else (200, {"status": "ok"})
+        if method != "POST" or path != "/predict":
+            return 404, {"error": "Not found"}
+
+        # Backpressure: refuse new work instead of letting the queue grow without bound
+        if self.draining or self.pending >= self.max_pending:
+            self.metrics.observe_rejected()
+            return 429, {"error": "Server is overloaded, retry later"}
+
+        start = time.perf_counter()
+        try:
+            records, single = parse_payload(json.loads(body), self.feature_cols)
+        except ValueError as e:
+            self.metrics.observe_request(time.perf_counter() - start, ok=False)
+            return 400, {"error": str(e)}
+
+        self.pending += 1
+        self._idle.clear()
+        try:
+            results = await self.batcher.submit(records)
+        except Exception as e:
+            self.metrics.observe_request(time.perf_counter() - start, ok=False)
+            return 500, {"error": str(e)}
+        finally:
+            self.pending -= 1
+            if self.pending == 0:
+                self._idle.set()
+
+        self.metrics.observe_request(time.perf_counter() - start)
+        return 200, results[0] if single else {"results": results}
+
+    async def drain(self, timeout):
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Drain timed out with {self.pending} requests still pending")
+
+
+async def serve(args):
+    loop = asyncio.get_running_loop()
+    metrics = ServerMetrics()
+    feature_cols = load_schema()["feature_cols"]
+
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker) as pool:
+        # Start every worker and load its model before accepting connections
+        await asyncio.gather(*[loop.run_in_executor(pool, _init_worker) for _ in range(args.workers)])
+
+        batcher = AsyncBatcher(pool, metrics, args.window_ms / 1e3, args.max_batch, max_batches=2 * args.workers)
+        app = AsyncPredictionServer(batcher, metrics, feature_cols, args.max_pending)
+        batcher_task = asyncio.create_task(batcher.run())
+
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        server = await asyncio.start_server(app.handle_connection, args.host, args.port, backlog=args.backlog)
+        print(f"Serving predictions on http://{args.host}:{args.port} with {args.workers} worker processes")
+        await stop.wait()
+
+        # Graceful drain: stop accepting, let admitted requests finish, then stop the workers
+        print("Shutting down, draining in-flight requests...")
+        server.close()
+        await app.drain(args.drain_timeout)
+        batcher_task.cancel()
+    print("Stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve exam score predictions with an asyncio front-end.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=2, help="Scoring processes (default: 2)")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="Micro-batching window (default: 2 ms)")
+    parser.add_argument("--max-batch", type=int, default=512, help="Maximum rows per model call (default: 512)")
+    parser.add_argument("--max-pending", type=int, default=1_000,
+                        help="Requests admitted at once before answering 429 (default: 1000)")
+    parser.add_argument("--backlog", type=int, default=1_024, help="Listen backlog (default: 1024)")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="Seconds to wait on shutdown (default: 30)")
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
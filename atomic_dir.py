@@ -0,0 +1,50 @@
+import errno
+import os
+import shutil
+import tempfile
+import uuid
+
+# Artifact directories (model_flat/, merged_dataset_columns/) are memory-mapped by
+# running processes, so they are never rewritten in place: a new copy is built
+# next to them and renamed over the old one. Old files are only unlinked, so
+# existing mappings stay valid until the processes using them let go.
+
+
+def temp_sibling(path):
+    # Private build directory next to path (same filesystem, so rename works),
+    # unique per call so concurrent builders never share one
+    path = path.rstrip(os.sep)
+    tmp = tempfile.mkdtemp(prefix=f"{os.path.basename(path)}.tmp-", dir=os.path.dirname(path) or ".")
+    # mkdtemp creates the directory private to its owner; published copies are shared
+    os.chmod(tmp, 0o755)
+    return tmp
+
+
+def replace_directory(tmp, path):
+    # Directories cannot be renamed over non-empty ones, so the old copy is moved
+    # aside first. Readers that race with the swap see a missing or a different
+    # directory and retry (see directory_id).
+    while True:
+        old = f"{path.rstrip(os.sep)}.old-{uuid.uuid4().hex}"
+        try:
+            os.rename(path, old)
+        except FileNotFoundError:
+            old = None
+        try:
+            os.rename(tmp, path)
+            return
+        except OSError as e:
+            # Another process published its copy in between; move that one aside too
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                raise
+        finally:
+            if old is not None:
+                shutil.rmtree(old, ignore_errors=True)
+
+
+def directory_id(path):
+    # Changes whenever replace_directory() swaps in a new copy
+    try:
+        return os.stat(path).st_ino
+    except OSError:
+        return None
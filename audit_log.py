@@ -0,0 +1,306 @@
+import argparse
+import atexit
+import itertools
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+# Append-only record of every prediction made from the forms. The submit path
+# only appends a tuple to an in-memory buffer; a daemon thread writes the buffer
+# out as fixed-size binary records every FLUSH_INTERVAL seconds (or as soon as
+# MAX_BUFFER records are waiting), so a crash loses at most one buffer.
+#
+# Segment file layout: MAGIC, a uint32 header length, a JSON header (feature
+# names, record sources), then packed records of record_dtype(n_features).
+# A new segment starts every SEGMENT_BYTES or when the feature list changes.
+# NumPy is imported lazily so that pages import this module for free.
+
+AUDIT_DIR = os.environ.get("APP_AUDIT_DIR", "audit_log")
+MAGIC = b"AUDITLOG"
+FORMAT_VERSION = 1
+FLUSH_INTERVAL = 1.0
+MAX_BUFFER = 1_000
+SEGMENT_BYTES = 64 * 1024 * 1024
+SEGMENT_SUFFIX = ".audit"
+
+# Where a prediction came from; stored as the index into this list
+SOURCES = ["app", "app_kurdish", "kurdish_page"]
+
+
+def record_dtype(n_features):
+    import numpy as np
+
+    return np.dtype([
+        ("timestamp_ns", "<i8"),
+        ("model_version", "<i4"),  # -1: model not from the registry
+        ("source", "u1"),
+        ("score", "<f8"),
+        ("inputs", "<f4", (n_features,)),
+    ])
+
+
+class AuditLog:
+
+    def __init__(self, path=AUDIT_DIR, flush_interval=FLUSH_INTERVAL, max_buffer=MAX_BUFFER,
+                 segment_bytes=SEGMENT_BYTES, fsync=True):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.dropped = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._fd = None
+        self._feature_cols = None
+        self._size = 0
+        os.makedirs(path, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, feature_cols, row, score, model_version=None, source="app"):
+        # row: the model input in feature_cols order, as assembled by the service
+        entry = (time.time_ns(), feature_cols, row, score,
+                 -1 if model_version is None else model_version, SOURCES.index(source))
+        with self._lock:
+            self._buffer.append(entry)
+            full = len(self._buffer) >= self.max_buffer
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return
+        with self._write_lock:
+            try:
+                for feature_cols, group in itertools.groupby(entries, key=lambda entry: entry[1]):
+                    self._write(feature_cols, list(group))
+            except OSError as e:
+                # Keep serving predictions; the failure is counted and reported. The
+                # segment may end in a partial record now, so later writes go to a new one.
+                self.dropped += len(entries)
+                print(f"Audit log write failed ({len(entries)} records): {e}", file=sys.stderr)
+                self._close_segment()
+
+    def _write(self, feature_cols, entries):
+        import numpy as np
+
+        records = np.empty(len(entries), dtype=record_dtype(len(feature_cols)))
+        records["timestamp_ns"] = [entry[0] for entry in entries]
+        records["inputs"] = np.stack([entry[2] for entry in entries])
+        records["score"] = [entry[3] for entry in entries]
+        records["model_version"] = [entry[4] for entry in entries]
+        records["source"] = [entry[5] for entry in entries]
+        data = records.tobytes()
+
+        if self._fd is None or feature_cols != self._feature_cols or self._size + len(data) > self.segment_bytes:
+            self._open_segment(feature_cols)
+        _write_all(self._fd, data)
+        if self.fsync:
+            os.fsync(self._fd)
+        self._size += len(data)
+
+    def _close_segment(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+    def _open_segment(self, feature_cols):
+        self._close_segment()
+        # Nanosecond start time first so names sort chronologically; pid keeps
+        # processes that log into the same directory apart
+        name = f"{time.time_ns()}-{os.getpid()}{SEGMENT_SUFFIX}"
+        header = json.dumps({
+            "format": FORMAT_VERSION,
+            "feature_cols": list(feature_cols),
+            "sources": SOURCES,
+        }).encode("utf-8")
+        self._fd = os.open(os.path.join(self.path, name), os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+        self._feature_cols = feature_cols
+        self._size = len(MAGIC) + 4 + len(header)
+        _write_all(self._fd, MAGIC + struct.pack("<I", len(header)) + header)
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        with self._write_lock:
+            self._close_segment()
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def read_segment(path):
+    # (header, records). A record cut short by a crash mid-write is ignored;
+    # a segment whose header never made it to disk has no records.
+    import numpy as np
+
+    with open(path, "rb") as f:
+        prefix = f.read(len(MAGIC) + 4)
+        if len(prefix) < len(MAGIC) + 4 or prefix[:len(MAGIC)] != MAGIC:
+            return None, None
+        (header_len,) = struct.unpack("<I", prefix[len(MAGIC):])
+        try:
+            header = json.loads(f.read(header_len))
+        except ValueError:
+            return None, None
+        dtype = record_dtype(len(header["feature_cols"]))
+        offset = len(MAGIC) + 4 + header_len
+        count = (os.fstat(f.fileno()).st_size - offset) // dtype.itemsize
+        return header, np.fromfile(f, dtype=dtype, count=count)
+
+
+def segment_paths(path=AUDIT_DIR):
+    try:
+        names = sorted(name for name in os.listdir(path) if name.endswith(SEGMENT_SUFFIX))
+    except OSError:
+        return []
+    return [os.path.join(path, name) for name in names]
+
+
+def read_audit_log(path=AUDIT_DIR, since=None, until=None):
+    # Every record as a DataFrame: timestamp, model_version, source, score and
+    # one column per input feature. since/until are datetimes or anything
+    # pandas.Timestamp accepts (UTC when naive).
+    import numpy as np
+    import pandas as pd
+
+    since_ns = pd.Timestamp(since, tz="UTC").value if since is not None else None
+    until_ns = pd.Timestamp(until, tz="UTC").value if until is not None else None
+    frames = []
+    for segment in segment_paths(path):
+        header, records = read_segment(segment)
+        if records is None or not len(records):
+            continue
+        keep = np.ones(len(records), dtype=bool)
+        if since_ns is not None:
+            keep &= records["timestamp_ns"] >= since_ns
+        if until_ns is not None:
+            keep &= records["timestamp_ns"] < until_ns
+        records = records[keep]
+        frame = pd.DataFrame(records["inputs"], columns=header["feature_cols"])
+        frame.insert(0, "timestamp", pd.to_datetime(records["timestamp_ns"], unit="ns", utc=True))
+        frame.insert(1, "model_version", records["model_version"])
+        frame.insert(2, "source", pd.Categorical.from_codes(records["source"], header["sources"]))
+        frame.insert(3, "score", records["score"])
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["timestamp", "model_version", "source", "score"])
+    return pd.concat(frames, ignore_index=True).sort_values("timestamp", kind="stable", ignore_index=True)
+
+
+_audit_log = None
+_audit_lock = threading.Lock()
+_audit_disabled = False
+unlogged = 0  # predictions served without an audit record (writer unavailable or failed)
+
+
+def get_audit_log():
+    # One writer per process, started on the first prediction. None when the audit
+    # directory cannot be created; that is reported once and not retried.
+    global _audit_log, _audit_disabled
+    if _audit_log is None and not _audit_disabled:
+        with _audit_lock:
+            if _audit_log is None and not _audit_disabled:
+                try:
+                    _audit_log = AuditLog()
+                except OSError as e:
+                    _audit_disabled = True
+                    print(f"Audit log disabled, cannot open {AUDIT_DIR}: {e}", file=sys.stderr)
+    return _audit_log
+
+
+def log_prediction(service, record, result, source="app"):
+    # Called right after evaluate(); re-assembling the row costs a few microseconds.
+    # Never raises: a prediction that was made is shown even if it cannot be audited.
+    global unlogged
+    try:
+        log = get_audit_log()
+        if log is not None:
+            log.record(service.feature_cols, service.assemble_row(record), result["score"],
+                       service.version, source)
+            return
+    except Exception as e:
+        print(f"Audit record failed: {e}", file=sys.stderr)
+    unlogged += 1
+
+
+def _benchmark(n_records):
+    import shutil
+    import tempfile
+
+    import numpy as np
+    import pandas  # noqa: F401  (imported here so the read timing below does not include it)
+
+    feature_cols = [f"f{i}" for i in range(14)]
+    row = np.arange(14, dtype=np.float32)
+    path = tempfile.mkdtemp(prefix="audit_bench_")
+    try:
+        log = AuditLog(path)
+        start = time.perf_counter()
+        for i in range(n_records):
+            log.record(feature_cols, row, 70.0 + i % 30, 1)
+        submit = time.perf_counter() - start
+        log.close()
+        start = time.perf_counter()
+        df = read_audit_log(path)
+        read = time.perf_counter() - start
+        size_mb = sum(os.path.getsize(p) for p in segment_paths(path)) / 1e6
+        print(f"Submit path: {submit / n_records * 1e6:.2f} us per prediction ({n_records:,} records)")
+        print(f"Read back {len(df):,} records ({size_mb:.1f} MB) in {read * 1e3:.0f} ms "
+              f"({len(df) / read:,.0f} records/sec)")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize or export the prediction audit log.")
+    parser.add_argument("--path", default=AUDIT_DIR, help=f"Audit log directory (default: {AUDIT_DIR})")
+    parser.add_argument("--since", help="Only records at or after this time (UTC), e.g. 2025-01-31T08:00")
+    parser.add_argument("--until", help="Only records before this time (UTC)")
+    parser.add_argument("--export", help="Write the selected records to this CSV file")
+    parser.add_argument("--benchmark", type=int, metavar="N",
+                        help="Measure submit-path cost and read speed with N synthetic records, then exit")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        _benchmark(args.benchmark)
+        return
+
+    start = time.perf_counter()
+    df = read_audit_log(args.path, args.since, args.until)
+    elapsed = time.perf_counter() - start
+    print(f"{len(df):,} predictions from {len(segment_paths(args.path))} segments in {elapsed * 1e3:.0f} ms")
+    if len(df):
+        print(f"From {df['timestamp'].iloc[0]} to {df['timestamp'].iloc[-1]}")
+        print(df.groupby(["model_version", "source"], observed=True)["score"].agg(["count", "mean"]).round(2))
+    if args.export:
+        df.to_csv(args.export, index=False)
+        print(f"Saved to {args.export}")
+
+
+if __name__ == "__main__":
+    main()
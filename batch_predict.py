@@ -0,0 +1,133 @@
+import argparse
+import multiprocessing as mp
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from grading import LANGUAGES, banding, round_scores
+from schema import load_schema
+
+
+# Forest used by pool workers. With the fork start method it is inherited from the
+# parent, so the tree arrays are shared copy-on-write instead of pickled per task
+_worker_model = None
+
+
+def _init_worker(model_path):
+    global _worker_model
+    if _worker_model is None:
+        # Spawned worker: load once from the uncompressed artifact via memory mapping
+        _worker_model = joblib.load(model_path, mmap_mode="r")
+
+
+def _predict_block(block):
+    return _worker_model.predict(block)
+
+
+def make_pool(model, model_path, workers):
+    global _worker_model
+    _worker_model = model
+    methods = mp.get_all_start_methods()
+    ctx = mp.get_context("fork" if "fork" in methods else methods[0])
+    return ctx.Pool(workers, initializer=_init_worker, initargs=(model_path,))
+
+
+def predict_parallel(pool, X, n_blocks):
+    # Split rows into contiguous blocks; map() returns them in input order
+    bounds = np.linspace(0, len(X), n_blocks + 1, dtype=int)
+    blocks = [X.iloc[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+    return np.concatenate(pool.map(_predict_block, blocks))
+
+
+def score_chunk(model, chunk, feature_cols, pool=None, n_blocks=1, language="en"):
+    missing = [col for col in feature_cols if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"Input is missing feature columns: {', '.join(missing)}")
+
+    X = chunk[feature_cols]
+    if pool is not None:
+        scores = round_scores(predict_parallel(pool, X, n_blocks))
+    else:
+        scores = round_scores(model.predict(X))
+    levels, status = banding.classify(scores, language)
+
+    chunk["PredictedExamScore"] = scores
+    chunk["Level"] = levels
+    chunk["Status"] = status
+    return chunk
+
+
+def score_csv(model, input_path, output_path, feature_cols, chunksize=50_000, pool=None, n_blocks=1,
+              language="en"):
+    rows = 0
+    start = time.perf_counter()
+
+    # Read, score and write one chunk at a time so memory stays bounded by chunksize
+    with open(output_path, "w", newline="", encoding="utf-8") as out:
+        for i, chunk in enumerate(pd.read_csv(input_path, chunksize=chunksize)):
+            scored = score_chunk(model, chunk, feature_cols, pool, n_blocks, language)
+            scored.to_csv(out, header=(i == 0), index=False)
+
+            rows += len(scored)
+            elapsed = time.perf_counter() - start
+            print(f"Scored {rows:,} rows ({rows / elapsed:,.0f} rows/sec)")
+
+    return rows, time.perf_counter() - start
+
+
+def measure_scaling(model, model_path, X, max_workers):
+    results = []
+    for workers in range(1, max_workers + 1):
+        with make_pool(model, model_path, workers) as pool:
+            # Warm up so worker start-up is not counted
+            predict_parallel(pool, X.iloc[:workers], workers)
+            start = time.perf_counter()
+            predict_parallel(pool, X, workers)
+            elapsed = time.perf_counter() - start
+        results.append((workers, elapsed))
+
+    base = results[0][1]
+    print(f"\n{'Workers':>7} {'Seconds':>9} {'Rows/sec':>12} {'Speedup':>8} {'Efficiency':>10}")
+    for workers, elapsed in results:
+        speedup = base / elapsed
+        print(f"{workers:>7} {elapsed:>9.3f} {len(X) / elapsed:>12,.0f} {speedup:>7.2f}x {speedup / workers:>9.0%}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV of students with the trained model.")
+    parser.add_argument("input", help="CSV file with the 14 feature columns")
+    parser.add_argument("output", help="CSV file to write the scored rows to")
+    parser.add_argument("--model", default="model.pkl", help="Trained model (default: model.pkl)")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="Rows per chunk (default: 50000)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for prediction (default: 1)")
+    parser.add_argument("--scaling", action="store_true",
+                        help="Report throughput and efficiency for 1..--workers processes on the first chunk")
+    parser.add_argument("--language", choices=LANGUAGES, default="en",
+                        help="Language of the Level and Status labels (default: en)")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    feature_cols = load_schema()["feature_cols"]
+
+    if args.scaling:
+        X = next(iter(pd.read_csv(args.input, chunksize=args.chunksize)))[feature_cols]
+        measure_scaling(model, args.model, X, args.workers)
+        return
+
+    if args.workers > 1:
+        with make_pool(model, args.model, args.workers) as pool:
+            rows, elapsed = score_csv(model, args.input, args.output, feature_cols,
+                                      args.chunksize, pool, args.workers, args.language)
+    else:
+        rows, elapsed = score_csv(model, args.input, args.output, feature_cols, args.chunksize,
+                                  language=args.language)
+
+    print(f"\nDone: {rows:,} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/sec)")
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
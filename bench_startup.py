@@ -0,0 +1,78 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Each scenario runs in a fresh interpreter so imports and model loading are cold.
+# The child prints cumulative seconds at each milestone as JSON.
+
+LAZY_STARTUP = """
+import json, time
+start = time.perf_counter()
+marks = {}
+import prediction_service
+marks["import"] = time.perf_counter() - start
+schema = prediction_service.get_schema()
+marks["form_ready"] = time.perf_counter() - start
+service = prediction_service.get_service()
+marks["model_loaded"] = time.perf_counter() - start
+record = {col: int(info["mean"]) for col, info in schema["columns"].items()}
+service.evaluate([record])
+marks["first_prediction"] = time.perf_counter() - start
+print(json.dumps(marks))
+"""
+
+LEGACY_STARTUP = """
+import json, time
+start = time.perf_counter()
+marks = {}
+import pandas as pd
+import joblib
+marks["import"] = time.perf_counter() - start
+model = joblib.load("model.pkl")
+df = pd.read_csv("merged_dataset.csv")
+feature_cols = df.drop(["ExamScore", "FinalGrade"], axis=1).columns.tolist()
+marks["form_ready"] = time.perf_counter() - start
+marks["model_loaded"] = marks["form_ready"]
+record = {col: int(df[col].mean()) for col in feature_cols}
+model.predict(pd.DataFrame([record])[feature_cols])
+marks["first_prediction"] = time.perf_counter() - start
+print(json.dumps(marks))
+"""
+
+SCENARIOS = {
+    "lazy (schema + mmap flat forest)": LAZY_STARTUP,
+    "legacy (pandas + model.pkl + CSV)": LEGACY_STARTUP,
+}
+MILESTONES = ["import", "form_ready", "model_loaded", "first_prediction"]
+
+
+def run_scenario(code, repeat):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {milestone: statistics.median(run[milestone] for run in runs) for milestone in MILESTONES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start: imports, form render and first prediction.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per scenario (default: 5)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = {name: run_scenario(code, args.repeat) for name, code in SCENARIOS.items()}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Median of {args.repeat} cold starts, milliseconds since process start\n")
+    print(f"{'Scenario':<36}" + "".join(f"{milestone:>18}" for milestone in MILESTONES))
+    for name, marks in results.items():
+        print(f"{name:<36}" + "".join(f"{marks[milestone] * 1e3:>18.1f}" for milestone in MILESTONES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from dataset import convert_dataset, load_columns, load_dataset
+from flat_forest import FLAT_MODEL_PATH, load_flat_forest
+from schema import DROP_COLS, TARGET_COL
+from synthetic import SyntheticGenerator
+
+BASELINE_PATH = "benchmark_baseline.json"
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000]
+
+
+def scale_dataset(df, factor, seed=42):
+    # The real rows plus synthetic ones drawn from the same distributions, factor times the size
+    if factor == 1:
+        return df
+    extra = len(df) * (factor - 1)
+    synthetic = pd.concat(SyntheticGenerator.fit(df).chunks(extra, seed=seed), ignore_index=True)
+    return pd.concat([df, synthetic], ignore_index=True)
+
+
+def timed(fn, repeat):
+    # Median wall time of repeat calls, in seconds
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def metric(value, unit, better="lower"):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def bench_dataset_load(df, scales, repeat, seed):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in scales:
+            csv_path = os.path.join(tmp, f"dataset_x{factor}.csv")
+            binary_path = os.path.join(tmp, f"dataset_x{factor}_columns")
+            scale_dataset(df, factor, seed).to_csv(csv_path, index=False)
+
+            results[f"load.csv.x{factor}"] = metric(timed(lambda: pd.read_csv(csv_path), repeat), "s")
+            results[f"load.convert.x{factor}"] = metric(timed(lambda: convert_dataset(csv_path, binary_path), 1), "s")
+            results[f"load.binary.x{factor}"] = metric(
+                timed(lambda: load_dataset(csv_path, binary_path), repeat), "s")
+            results[f"load.binary_mmap.x{factor}"] = metric(
+                timed(lambda: load_columns(csv_path, binary_path), repeat), "s")
+    return results
+
+
+def bench_training(df, scales, n_estimators, n_jobs, seed):
+    results = {}
+    for factor in scales:
+        data = scale_dataset(df, factor, seed)
+        X, y = data.drop(DROP_COLS, axis=1), data[TARGET_COL]
+        for trees in n_estimators:
+            for jobs in n_jobs:
+                model = RandomForestRegressor(n_estimators=trees, random_state=42, n_jobs=jobs)
+                results[f"train.x{factor}.trees{trees}.jobs{jobs}"] = metric(timed(lambda: model.fit(X, y), 1), "s")
+    return results
+
+
+def bench_deserialization(repeat):
+    results = {"deserialize.model_pkl": metric(timed(lambda: joblib.load("model.pkl"), repeat), "s")}
+    load_flat_forest(FLAT_MODEL_PATH)
+    results["deserialize.flat"] = metric(timed(lambda: load_flat_forest(FLAT_MODEL_PATH), repeat), "s")
+    # Mapping is lazy, so also time reading every page of the arrays
+    results["deserialize.flat_touch"] = metric(
+        timed(lambda: [np.array(a) for a in load_flat_forest(FLAT_MODEL_PATH).arrays().values()], repeat), "s")
+    return results
+
+
+def bench_single_row(df, samples, seed):
+    # The app's submit path: one form record through PredictionService.evaluate
+    from prediction_service import get_service
+
+    service = get_service()
+    rng = np.random.default_rng(seed)
+    records = df[service.feature_cols].iloc[rng.integers(0, len(df), samples)].to_dict("records")
+    service.evaluate(records[:1])
+
+    results = {}
+    for name, clear in [("uncached", True), ("cached", False)]:
+        if not clear:
+            # Fill the cache first so every timed call is a hit
+            for record in records:
+                service.evaluate([record])
+        timings = []
+        for record in records:
+            if clear:
+                service.cache.clear()
+            start = time.perf_counter()
+            service.evaluate([record])
+            timings.append(time.perf_counter() - start)
+        timings = np.array(timings) * 1e3
+        results[f"single_row.{name}.p50"] = metric(float(np.percentile(timings, 50)), "ms")
+        results[f"single_row.{name}.p99"] = metric(float(np.percentile(timings, 99)), "ms")
+    return results
+
+
+def bench_batch(df, batch_sizes, repeat, seed):
+    model = joblib.load("model.pkl")
+    forest = load_flat_forest(FLAT_MODEL_PATH)
+    X = scale_dataset(df, max(1, -(-max(batch_sizes) // len(df))), seed)[forest.feature_names]
+
+    results = {}
+    for size in batch_sizes:
+        batch = X.iloc[:size]
+        batch_np = batch.to_numpy()
+        sk = timed(lambda: model.predict(batch), repeat)
+        flat = timed(lambda: forest.predict(batch_np), repeat)
+        results[f"batch.sklearn.{size}"] = metric(size / sk, "rows/s", "higher")
+        results[f"batch.flat.{size}"] = metric(size / flat, "rows/s", "higher")
+    return results
+
+
+def compare(results, baseline, threshold):
+    # Relative change per metric, signed so that positive always means slower/worse
+    rows = []
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        old, new = baseline[name]["value"], current["value"]
+        if old == 0:
+            continue
+        change = (new - old) / old
+        worse = change if current["better"] == "lower" else -change
+        rows.append((name, old, new, current["unit"], change, worse > threshold))
+    return rows
+
+
+def print_results(results):
+    print(f"\n{'Metric':<36} {'Value':>14}  Unit")
+    for name, m in results.items():
+        print(f"{name:<36} {m['value']:>14.4g}  {m['unit']}")
+
+
+def print_comparison(rows, threshold):
+    print(f"\nAgainst baseline (regression threshold {threshold:.0%})")
+    print(f"{'Metric':<36} {'Baseline':>12} {'Current':>12} {'Change':>9}")
+    for name, old, new, unit, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<36} {old:>12.4g} {new:>12.4g} {change:>+9.1%}{flag}")
+
+
+def _int_list(text):
+    return [int(v) for v in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dataset loading, training, model loading and prediction.")
+    parser.add_argument("--suites", default="load,train,deserialize,single,batch",
+                        help="Comma-separated suites to run (default: all)")
+    parser.add_argument("--scales", type=_int_list, default=[1, 10],
+                        help="Synthetic dataset sizes as multiples of merged_dataset.csv (default: 1,10)")
+    parser.add_argument("--train-scales", type=_int_list, default=[1],
+                        help="Dataset multiples used for training benchmarks (default: 1)")
+    parser.add_argument("--n-estimators", type=_int_list, default=[10, 50], help="Forest sizes (default: 10,50)")
+    parser.add_argument("--n-jobs", type=_int_list, default=[1, -1], help="Training parallelism (default: 1,-1)")
+    parser.add_argument("--batch-sizes", type=_int_list, default=BATCH_SIZES,
+                        help="Batch sizes for throughput (default: 1,10,100,1000,10000)")
+    parser.add_argument("--samples", type=int, default=300, help="Single-row predictions to time (default: 300)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per timing, median kept (default: 3)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for synthetic rows (default: 42)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help=f"Baseline to compare with (default: {BASELINE_PATH})")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative slowdown that counts as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    suites = args.suites.split(",")
+    df = load_dataset()
+    results = {}
+    if "load" in suites:
+        results.update(bench_dataset_load(df, args.scales, args.repeat, args.seed))
+    if "train" in suites:
+        results.update(bench_training(df, args.train_scales, args.n_estimators, args.n_jobs, args.seed))
+    if "deserialize" in suites:
+        results.update(bench_deserialization(args.repeat))
+    if "single" in suites:
+        results.update(bench_single_row(df, args.samples, args.seed))
+    if "batch" in suites:
+        results.update(bench_batch(df, args.batch_sizes, args.repeat, args.seed))
+    print_results(results)
+
+    report = {
+        "machine": {"python": sys.version.split()[0], "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        rows = compare(results, baseline, args.threshold)
+        print_comparison(rows, args.threshold)
+        regressions = [row for row in rows if row[-1]]
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
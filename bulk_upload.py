@@ -0,0 +1,85 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from grading import banding, round_scores
+
+UPLOAD_CHUNKSIZE = 10_000
+
+
+def read_chunks(file, name, chunksize=UPLOAD_CHUNKSIZE):
+    # Yields (DataFrame chunk, fraction of the file read so far)
+    if name.lower().endswith((".xlsx", ".xlsm")):
+        yield from _read_excel_chunks(file, chunksize)
+        return
+
+    size = getattr(file, "size", None) or 0
+    for chunk in pd.read_csv(file, chunksize=chunksize):
+        yield chunk, min(file.tell() / size, 1.0) if size else 0.0
+
+
+def _read_excel_chunks(file, chunksize):
+    from openpyxl import load_workbook
+
+    # Read-only mode streams rows from the sheet XML instead of building the whole workbook
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else "" for value in next(rows, [])]
+        total = max((sheet.max_row or 0) - 1, 0)
+        done = 0
+        while True:
+            block = list(itertools.islice(rows, chunksize))
+            if not block:
+                break
+            done += len(block)
+            yield pd.DataFrame(block, columns=header), min(done / total, 1.0) if total else 0.0
+    finally:
+        workbook.close()
+
+
+def validate_chunk(chunk, feature_cols, columns):
+    # Vectorized checks against the schema. Returns the float32 feature matrix
+    # (missing columns filled with the training mean) and one error string per row
+    # ("" for valid rows).
+    X = np.empty((len(chunk), len(feature_cols)), dtype=np.float32)
+    errors = np.full(len(chunk), "", dtype=object)
+    for j, col in enumerate(feature_cols):
+        info = columns[col]
+        if col not in chunk.columns:
+            X[:, j] = info["mean"]
+            continue
+        values = pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=np.float64)
+        bad = ~np.isfinite(values) | (values < info["min"]) | (values > info["max"])
+        if info["dtype"].startswith("int"):
+            bad |= values % 1 != 0
+        if bad.any():
+            errors[bad] = errors[bad] + f"{col}, "
+        X[:, j] = np.where(bad, info["mean"], values)
+
+    invalid = errors != ""
+    errors[invalid] = ["Invalid " + message[:-2] for message in errors[invalid]]
+    return X, errors
+
+
+def score_chunk(service, chunk, language="en"):
+    # Scores the valid rows; invalid ones keep empty predictions and an error message
+    X, errors = validate_chunk(chunk, service.feature_cols, service.columns)
+    valid = errors == ""
+    scores = np.full(len(chunk), np.nan)
+    if valid.any():
+        scores[valid] = round_scores(service.predict_array(X[valid]))
+    levels, status = banding.classify(scores, language)
+
+    scored = chunk.copy()
+    scored["PredictedExamScore"] = scores
+    scored["Level"] = levels
+    scored["Status"] = status
+    scored["Error"] = errors
+    return scored
+
+
+def missing_columns(chunk, feature_cols):
+    return [col for col in feature_cols if col not in chunk.columns]
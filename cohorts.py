@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from dataset import CHUNKSIZE, DATASET_PATH
+from prediction_cache import MODEL_PATH, model_stamp
+from schema import TARGET_COL
+
+COHORTS_PATH = "cohort_cubes"
+
+# Low-cardinality columns the dashboard can filter and group by
+DIMENSIONS = [
+    "LearningStyle", "Motivation", "StressLevel", "Resources", "Gender", "Age",
+    "Internet", "EduTech", "Extracurricular", "Discussions",
+]
+VALUE_LABELS = {
+    "LearningStyle": {0: "Visual", 1: "Auditory", 2: "Kinesthetic", 3: "Reading/Writing"},
+    "Motivation": {0: "Low", 1: "Medium", 2: "High"},
+    "StressLevel": {0: "Low", 1: "Medium", 2: "High"},
+    "Resources": {0: "Low", 1: "Medium", 2: "High"},
+    "Gender": {0: "Male", 1: "Female"},
+    "Internet": {0: "No", 1: "Yes"},
+    "EduTech": {0: "No", 1: "Yes"},
+    "Extracurricular": {0: "No", 1: "Yes"},
+    "Discussions": {0: "No", 1: "Yes"},
+}
+
+# Sums kept per cell; means, spreads and errors are derived from them
+STATS = ["count", "actual_sum", "actual_sq", "predicted_sum", "predicted_sq", "abs_error_sum"]
+SCORE_BINS = np.arange(40, 105, 5)
+HISTOGRAMS = ["actual_hist", "predicted_hist"]
+
+
+class CohortCube:
+    # Additive statistics for every combination of dimension values. Any filter is
+    # a selection along the axes and any grouping a sum over the remaining ones,
+    # so the dashboard never rescans rows.
+
+    def __init__(self, dims, levels, stats, actual_hist, predicted_hist, bins, version):
+        self.dims = list(dims)
+        self.levels = {dim: list(levels[dim]) for dim in self.dims}
+        self.stats = stats
+        self.actual_hist = actual_hist
+        self.predicted_hist = predicted_hist
+        self.bins = np.asarray(bins)
+        self.version = version
+
+    def _select(self, array, filters):
+        # filters: {dim: [values to keep]}; dims left out keep every value
+        index = []
+        for dim in self.dims:
+            keep = (filters or {}).get(dim)
+            levels = self.levels[dim]
+            index.append([i for i, v in enumerate(levels) if keep is None or v in keep])
+        return array[np.ix_(*index)]
+
+    def _grouped(self, array, by, filters):
+        selected = self._select(array, filters)
+        keep_axes = [self.dims.index(dim) for dim in by]
+        other_axes = tuple(i for i in range(len(self.dims)) if i not in keep_axes)
+        grouped = selected.sum(axis=other_axes)
+        # sum() keeps the remaining axes in cube order; put them in the order asked for
+        order = sorted(range(len(by)), key=lambda i: keep_axes[i])
+        return np.moveaxis(grouped, list(range(len(by))), order)
+
+    def summary(self, filters=None):
+        return _describe(self._grouped(self.stats, [], filters))
+
+    def group(self, by, filters=None):
+        # One row per combination of values of the `by` dimensions
+        grouped = self._grouped(self.stats, by, filters)
+        kept = [[v for v in self.levels[dim] if not filters or filters.get(dim) is None or v in filters[dim]]
+                for dim in by]
+        rows = []
+        for position in np.ndindex(*grouped.shape[:-1]):
+            totals = grouped[position]
+            if totals[0] == 0:
+                continue
+            key = {dim: kept[i][j] for i, (dim, j) in enumerate(zip(by, position))}
+            rows.append({**key, **_describe(totals)})
+        return rows
+
+    def histogram(self, filters=None):
+        return {
+            "bins": self.bins.tolist(),
+            "actual": self._grouped(self.actual_hist, [], filters).tolist(),
+            "predicted": self._grouped(self.predicted_hist, [], filters).tolist(),
+        }
+
+
+def _describe(totals):
+    count, actual_sum, actual_sq, predicted_sum, predicted_sq, abs_error_sum = (float(v) for v in totals)
+    if count == 0:
+        return {"count": 0}
+    actual_mean = actual_sum / count
+    predicted_mean = predicted_sum / count
+    return {
+        "count": int(count),
+        "actual_mean": actual_mean,
+        "actual_std": max(actual_sq / count - actual_mean ** 2, 0.0) ** 0.5,
+        "predicted_mean": predicted_mean,
+        "predicted_std": max(predicted_sq / count - predicted_mean ** 2, 0.0) ** 0.5,
+        "mae": abs_error_sum / count,
+    }
+
+
+def cube_version(dataset_path=DATASET_PATH, model_path=MODEL_PATH):
+    # Cubes are rebuilt whenever the dataset or the model changes
+    dataset = model_stamp(dataset_path)
+    model = model_stamp(model_path)
+    return {"dataset": list(dataset) if dataset else None, "model": list(model) if model else None}
+
+
+def build_cube(columns, model, dims=DIMENSIONS, bins=SCORE_BINS, chunksize=CHUNKSIZE, version=None):
+    # One pass over the (memory-mapped) columns, chunk by chunk
+    import pandas as pd
+
+    feature_names = list(model.feature_names_in_)
+    n_rows = len(columns[TARGET_COL])
+    levels = {dim: np.unique(columns[dim]).tolist() for dim in dims}
+    shape = tuple(len(levels[dim]) for dim in dims)
+    n_cells = int(np.prod(shape))
+    n_bins = len(bins) - 1
+
+    stats = np.zeros((n_cells, len(STATS)))
+    actual_hist = np.zeros(n_cells * n_bins, dtype=np.uint32)
+    predicted_hist = np.zeros(n_cells * n_bins, dtype=np.uint32)
+    for start in range(0, n_rows, chunksize):
+        stop = min(start + chunksize, n_rows)
+        cells = np.ravel_multi_index(
+            [np.searchsorted(levels[dim], columns[dim][start:stop]) for dim in dims], shape)
+        actual = np.asarray(columns[TARGET_COL][start:stop], dtype=np.float64)
+        X = pd.DataFrame({col: np.asarray(columns[col][start:stop]) for col in feature_names})
+        predicted = model.predict(X)
+
+        for i, weights in enumerate([None, actual, actual ** 2, predicted, predicted ** 2,
+                                     np.abs(predicted - actual)]):
+            stats[:, i] += np.bincount(cells, weights=weights, minlength=n_cells)
+        for hist, values in [(actual_hist, actual), (predicted_hist, predicted)]:
+            score_bins = np.clip(np.searchsorted(bins, values, side="right") - 1, 0, n_bins - 1)
+            hist += np.bincount(cells * n_bins + score_bins, minlength=len(hist)).astype(np.uint32)
+
+    return CohortCube(dims, levels, stats.reshape(shape + (len(STATS),)),
+                      actual_hist.reshape(shape + (n_bins,)), predicted_hist.reshape(shape + (n_bins,)),
+                      bins, version)
+
+
+def _sparse_arrays(cube):
+    # Most combinations of dimension values never occur, so only occupied cells are
+    # stored: their flat cell ids with their sums, and the non-zero histogram counts
+    stats = cube.stats.reshape(-1, len(STATS))
+    cells = np.flatnonzero(stats[:, 0])
+    arrays = {"cells": cells.astype(np.uint32), "stats": stats[cells]}
+    for name in HISTOGRAMS:
+        hist = getattr(cube, name).ravel()
+        nonzero = np.flatnonzero(hist)
+        arrays[f"{name}_index"] = nonzero.astype(np.uint32)
+        arrays[f"{name}_counts"] = hist[nonzero].astype(np.uint32)
+    return arrays
+
+
+def save_cube(cube, path=COHORTS_PATH):
+    os.makedirs(path, exist_ok=True)
+    arrays = _sparse_arrays(cube)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+    # Dense arrays left by cubes stored before the sparse layout
+    for name in os.listdir(path):
+        if name.endswith(".npy") and name[:-4] not in arrays:
+            os.remove(os.path.join(path, name))
+    meta = {
+        "dims": cube.dims,
+        "levels": cube.levels,
+        "bins": cube.bins.tolist(),
+        "version": cube.version,
+    }
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_cube(path=COHORTS_PATH, version=None):
+    # The stored cube, or None when missing or built for another dataset/model
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if version is not None and meta["version"] != version:
+        return None
+    names = ["cells", "stats"] + [f"{name}_{part}" for name in HISTOGRAMS for part in ["index", "counts"]]
+    try:
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy")) for name in names}
+    except (OSError, ValueError):
+        # Written in an older layout (or half-written): rebuilt by the caller
+        return None
+
+    # Back to dense arrays over every combination of dimension values
+    shape = tuple(len(meta["levels"][dim]) for dim in meta["dims"])
+    n_cells = int(np.prod(shape))
+    n_bins = len(meta["bins"]) - 1
+    stats = np.zeros((n_cells, len(STATS)))
+    stats[arrays["cells"]] = arrays["stats"]
+    hists = {}
+    for name in HISTOGRAMS:
+        hist = np.zeros(n_cells * n_bins, dtype=np.uint32)
+        hist[arrays[f"{name}_index"]] = arrays[f"{name}_counts"]
+        hists[name] = hist.reshape(shape + (n_bins,))
+    return CohortCube(meta["dims"], meta["levels"], stats.reshape(shape + (len(STATS),)), hists["actual_hist"],
+                      hists["predicted_hist"], meta["bins"], meta["version"])
+
+
+def get_cube(path=COHORTS_PATH):
+    # Current cube, built and stored on first use after the dataset or model changes
+    import joblib
+
+    from dataset import load_columns
+
+    version = cube_version()
+    cube = load_cube(path, version)
+    if cube is None:
+        cube = build_cube(load_columns(), joblib.load(MODEL_PATH), version=version)
+        try:
+            save_cube(cube, path)
+        except OSError:
+            pass
+    return cube
+
+
+def main():
+    import joblib
+
+    from dataset import load_columns
+
+    parser = argparse.ArgumentParser(description="Precompute cohort statistics for the analytics page.")
+    parser.add_argument("--output", default=COHORTS_PATH, help=f"Output directory (default: {COHORTS_PATH})")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE, help=f"Rows per chunk (default: {CHUNKSIZE:,})")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    columns = load_columns()
+    model = joblib.load(MODEL_PATH)
+    model.set_params(n_jobs=-1)
+    cube = build_cube(columns, model, chunksize=args.chunksize, version=cube_version())
+    save_cube(cube, args.output)
+
+    n_rows = len(columns[TARGET_COL])
+    occupied = int(np.count_nonzero(cube.stats[..., 0]))
+    size_mb = sum(a.nbytes for a in _sparse_arrays(cube).values()) / 1e6
+    print(f"Aggregated {n_rows:,} rows into {occupied:,} occupied of {cube.stats[..., 0].size:,} cells "
+          f"({size_mb:.2f} MB stored) in {time.perf_counter() - start:.1f}s -> {args.output}/")
+
+    start = time.perf_counter()
+    cube.group(["LearningStyle"], {"Motivation": [2]})
+    print(f"Filtered group-by from the cube: {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
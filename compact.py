@@ -0,0 +1,189 @@
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+
+from dataset import load_dataset
+from flat_forest import FLAT_MODEL_PATH, FlatForest, export_forest, load_flat_forest, save_flat_forest
+from prediction_cache import model_stamp
+from registry import REGISTRY_DIR
+from schema import DROP_COLS, TARGET_COL
+
+COMPACT_MODEL_PATH = "model_compact"
+
+
+def prune_tree(tree, max_depth=None, min_samples=1):
+    # Depth-first copy of one sklearn tree in which nodes deeper than max_depth,
+    # or split on fewer than min_samples training rows, become leaves. A node's
+    # value is the mean target of its samples, so a collapsed node predicts it directly.
+    feature, threshold, value, left, right = [], [], [], [], []
+    stack = [(0, 0, -1, False)]
+    while stack:
+        node, depth, parent, is_right = stack.pop()
+        new_id = len(feature)
+        if parent >= 0:
+            (right if is_right else left)[parent] = new_id
+
+        is_leaf = (tree.children_left[node] == -1
+                   or (max_depth is not None and depth >= max_depth)
+                   or tree.n_node_samples[node] < min_samples)
+        feature.append(-1 if is_leaf else tree.feature[node])
+        threshold.append(tree.threshold[node])
+        value.append(tree.value[node, 0, 0])
+        left.append(-1)
+        right.append(-1)
+        if not is_leaf:
+            stack.append((tree.children_right[node], depth + 1, new_id, True))
+            stack.append((tree.children_left[node], depth + 1, new_id, False))
+
+    return {
+        "feature": np.array(feature),
+        "threshold": np.array(threshold),
+        "value": np.array(value),
+        "children": np.stack([left, right], axis=1),
+        "depth": _depth(left, right),
+    }
+
+
+def _depth(left, right):
+    depths = [0] * len(left)
+    for node in range(len(left)):
+        if left[node] >= 0:
+            depths[left[node]] = depths[right[node]] = depths[node] + 1
+    return max(depths)
+
+
+def _exact_float_dtype(values):
+    # Smallest float type that stores every value exactly (split thresholds on
+    # integer features are half-integers, which float16 holds up to 1024)
+    for dtype in (np.float16, np.float32):
+        if np.array_equal(values.astype(dtype).astype(np.float64), values):
+            return dtype
+    return np.float64
+
+
+def _feature_dtype(n_features):
+    # Child indices stay int32: the evaluator computes 2 * node in their dtype
+    return np.int8 if n_features <= np.iinfo(np.int8).max else np.int32
+
+
+def build_forest(trees, feature_names, value_dtype=np.float32):
+    offsets = np.cumsum([0] + [len(t["feature"]) for t in trees])
+    children = np.concatenate([
+        np.where(t["children"] >= 0, t["children"] + offset, -1) for t, offset in zip(trees, offsets)
+    ])
+    threshold = np.concatenate([t["threshold"] for t in trees])
+    return FlatForest(
+        feature=np.concatenate([t["feature"] for t in trees]).astype(_feature_dtype(len(feature_names))),
+        threshold=threshold.astype(_exact_float_dtype(threshold)),
+        children=children.astype(np.int32),
+        value=np.concatenate([t["value"] for t in trees]).astype(value_dtype),
+        roots=offsets[:-1].astype(np.int32),
+        max_depth=max(t["depth"] for t in trees),
+        feature_names=feature_names,
+    )
+
+
+def select_trees(tree_predictions, y, n_keep):
+    # Greedy backward elimination: repeatedly drop the tree whose removal hurts
+    # the ensemble's validation error least (or helps it most)
+    y = np.asarray(y, dtype=np.float64)
+    keep = list(range(len(tree_predictions)))
+    total = tree_predictions.sum(axis=0)
+    while len(keep) > n_keep:
+        without = (total - tree_predictions[keep]) / (len(keep) - 1)
+        drop = keep[int(np.argmin(((without - y) ** 2).mean(axis=1)))]
+        total = total - tree_predictions[drop]
+        keep.remove(drop)
+    return keep
+
+
+def compact_model(model, X_val, y_val, max_depth=None, min_samples=1, keep_trees=None, value_dtype=np.float32):
+    feature_names = list(model.feature_names_in_)
+    trees = [prune_tree(e.tree_, max_depth, min_samples) for e in model.estimators_]
+
+    if keep_trees is not None and keep_trees < len(trees):
+        pruned = build_forest(trees, feature_names, np.float64)
+        tree_predictions = pruned.value[pruned.leaves(X_val)]
+        trees = [trees[i] for i in sorted(select_trees(tree_predictions, y_val, keep_trees))]
+
+    return build_forest(trees, feature_names, value_dtype)
+
+
+def _artifact_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def _load_time(load, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune and quantize the trained forest into a compact artifact.")
+    parser.add_argument("--max-depth", type=int, help="Collapse nodes below this depth into leaves")
+    parser.add_argument("--min-samples", type=int, default=1,
+                        help="Turn nodes trained on fewer rows than this into leaves (default: 1)")
+    parser.add_argument("--keep-trees", type=int, help="Keep only this many trees, dropping the least useful")
+    parser.add_argument("--value-dtype", choices=["float16", "float32", "float64"], default="float32",
+                        help="Precision of node values (default: float32)")
+    parser.add_argument("--output", default=COMPACT_MODEL_PATH, help=f"Output directory (default: {COMPACT_MODEL_PATH})")
+    args = parser.parse_args()
+    if args.max_depth is not None and args.max_depth < 1:
+        parser.error("--max-depth must be at least 1; a depth-0 forest predicts the training mean for everyone")
+    if args.min_samples < 1:
+        parser.error("--min-samples must be at least 1")
+    # The app serves model_flat/ exports of model.pkl from the registry; a compact forest
+    # there would disagree with model.pkl (and is replaced by a fresh export on load)
+    output = os.path.realpath(args.output)
+    if output == os.path.realpath(FLAT_MODEL_PATH) or output.startswith(os.path.realpath(REGISTRY_DIR) + os.sep):
+        parser.error(f"--output must not be {FLAT_MODEL_PATH}/ or inside {REGISTRY_DIR}/; the compact forest is not served")
+
+    # Same hold-out as train.py: half of it selects trees, the other half measures accuracy
+    df = load_dataset()
+    X = df.drop(DROP_COLS, axis=1)
+    y = df[TARGET_COL]
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_val, X_eval, y_val, y_eval = train_test_split(X_test, y_test, test_size=0.5, random_state=42)
+
+    model = joblib.load("model.pkl")
+    start = time.perf_counter()
+    forest = compact_model(model, X_val.to_numpy(np.float32), y_val, args.max_depth, args.min_samples,
+                           args.keep_trees, np.dtype(args.value_dtype))
+    # No source stamp: this is not an export of model.pkl
+    save_flat_forest(forest, args.output)
+    print(f"Compacted {len(model.estimators_)} trees into {forest.n_trees} trees, {len(forest.value):,} nodes, "
+          f"max depth {forest.max_depth} in {time.perf_counter() - start:.1f}s -> {args.output}/")
+
+    if not os.path.exists(os.path.join(FLAT_MODEL_PATH, "meta.json")):
+        save_flat_forest(export_forest(model), source_stamp=model_stamp())
+    X_eval_flat = X_eval.to_numpy(np.float32)
+    variants = [
+        ("model.pkl (sklearn)", "model.pkl", lambda: joblib.load("model.pkl"), lambda m: m.predict(X_eval)),
+        ("flat forest", FLAT_MODEL_PATH, lambda: load_flat_forest(FLAT_MODEL_PATH),
+         lambda m: m.predict(X_eval_flat)),
+        ("compact forest", args.output, lambda: load_flat_forest(args.output, None), lambda m: m.predict(X_eval_flat)),
+    ]
+
+    print(f"\nAccuracy on {len(y_eval):,} held-out rows not used for tree selection")
+    print(f"{'Artifact':<22} {'Size MB':>9} {'Load ms':>9} {'R²':>8} {'ΔR²':>9}")
+    baseline = None
+    for name, path, load, predict in variants:
+        score = r2_score(y_eval, predict(load()))
+        baseline = score if baseline is None else baseline
+        print(f"{name:<22} {_artifact_size(path) / 1e6:>9.2f} {_load_time(load) * 1e3:>9.1f} "
+              f"{score:>8.4f} {score - baseline:>+9.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from atomic_dir import directory_id, replace_directory, temp_sibling
+
+DATASET_PATH = "merged_dataset.csv"
+BINARY_PATH = "merged_dataset_columns"
+CHUNKSIZE = 1_000_000
+LOAD_ATTEMPTS = 3
+
+INT_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def _source_stamp(csv_path):
+    stat = os.stat(csv_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _smallest_dtype(low, high, integral):
+    if not integral:
+        return np.dtype(np.float64)
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def convert_dataset(csv_path=DATASET_PATH, out_path=BINARY_PATH, chunksize=CHUNKSIZE):
+    # Pass 1: row count and value range of every column, one chunk at a time
+    n_rows = 0
+    ranges = {}
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        n_rows += len(chunk)
+        for col in chunk.columns:
+            series = chunk[col]
+            if not pd.api.types.is_numeric_dtype(series):
+                raise ValueError(f"Column {col} is not numeric")
+            low, high, integral = ranges.get(col, (np.inf, -np.inf, True))
+            integral = integral and (pd.api.types.is_integer_dtype(series) or bool((series % 1 == 0).all()))
+            ranges[col] = (min(low, series.min()), max(high, series.max()), integral)
+
+    dtypes = {col: _smallest_dtype(*ranges[col]) for col in ranges}
+
+    # Pass 2: write each column into a preallocated, memory-mapped .npy file. The
+    # copy is built in a private directory and renamed over the old one, so
+    # processes that have the old columns mapped keep valid files, and two
+    # processes converting at once each publish a complete copy.
+    tmp = temp_sibling(out_path)
+    outputs = {
+        col: np.lib.format.open_memmap(os.path.join(tmp, f"{col}.npy"), mode="w+",
+                                       dtype=dtype, shape=(n_rows,))
+        for col, dtype in dtypes.items()
+    }
+    start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        stop = start + len(chunk)
+        for col, output in outputs.items():
+            output[start:stop] = chunk[col].to_numpy()
+        start = stop
+    for output in outputs.values():
+        output.flush()
+    del outputs
+
+    # Written last, so an interrupted conversion is never mistaken for a fresh one
+    meta = {
+        "columns": list(dtypes),
+        "dtypes": {col: dtype.name for col, dtype in dtypes.items()},
+        "n_rows": n_rows,
+        "source": _source_stamp(csv_path),
+    }
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    replace_directory(tmp, out_path)
+    return meta
+
+
+def _read_meta(binary_path):
+    try:
+        with open(os.path.join(binary_path, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(csv_path=DATASET_PATH, binary_path=BINARY_PATH):
+    meta = _read_meta(binary_path)
+    if meta is None:
+        return False
+    # Written directly (e.g. by synthetic.py), not converted from a CSV: nothing to rebuild from
+    if meta["source"] is None:
+        return True
+    if not os.path.exists(csv_path):
+        return True
+    return meta["source"] == _source_stamp(csv_path)
+
+
+def load_columns(csv_path=DATASET_PATH, binary_path=BINARY_PATH):
+    # Memory-mapped, downcast columns; rebuilt from the CSV when it has changed
+    if not is_fresh(csv_path, binary_path):
+        convert_dataset(csv_path, binary_path)
+    # Retried when another process swaps in a new copy mid-load
+    for _ in range(LOAD_ATTEMPTS):
+        before = directory_id(binary_path)
+        try:
+            meta = _read_meta(binary_path)
+            columns = {
+                col: np.load(os.path.join(binary_path, f"{col}.npy"), mmap_mode="r")
+                for col in meta["columns"]
+            }
+        except (FileNotFoundError, TypeError):
+            columns = None
+        if columns is not None and directory_id(binary_path) == before:
+            return columns
+        time.sleep(0.01)
+    raise OSError(f"{binary_path} kept changing while it was being loaded")
+
+
+def load_dataset(csv_path=DATASET_PATH, binary_path=BINARY_PATH):
+    try:
+        columns = load_columns(csv_path, binary_path)
+    except OSError:
+        # Read-only checkout without a usable binary copy: parse the CSV directly
+        return pd.read_csv(csv_path)
+    return pd.DataFrame({col: np.asarray(values) for col, values in columns.items()})
+
+
+if __name__ == "__main__":
+    # Convert the CSV and compare load time and memory with plain CSV parsing
+    start = time.perf_counter()
+    meta = convert_dataset()
+    print(f"Converted {meta['n_rows']:,} rows to {BINARY_PATH}/ in {time.perf_counter() - start:.2f}s")
+    print("Column types:", ", ".join(f"{col}={dtype}" for col, dtype in meta["dtypes"].items()))
+
+    start = time.perf_counter()
+    csv_df = pd.read_csv(DATASET_PATH)
+    csv_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    binary_df = load_dataset()
+    binary_time = time.perf_counter() - start
+
+    csv_mb = csv_df.memory_usage(index=False).sum() / 1e6
+    binary_mb = binary_df.memory_usage(index=False).sum() / 1e6
+    print(f"CSV:    {csv_time * 1e3:.1f} ms, {csv_mb:.2f} MB in memory")
+    print(f"Binary: {binary_time * 1e3:.1f} ms, {binary_mb:.2f} MB in memory")
@@ -0,0 +1,254 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from atomic_dir import directory_id, replace_directory, temp_sibling
+from prediction_cache import FLAT_MODEL_PATH, MODEL_PATH, model_stamp
+
+LOAD_ATTEMPTS = 3
+BLOCK_ROWS = 16_384
+
+
+class FlatForest:
+    # All trees of a RandomForestRegressor stored as contiguous node arrays
+    # (leaves have feature -1), so a batch is pushed through every tree at once
+    # without per-tree Python dispatch.
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth, feature_names):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names)
+        self.n_trees = len(roots)
+
+    def leaves(self, X):
+        # sklearn casts inputs to float32 before comparing against float64 thresholds
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        children = self.children.ravel()
+
+        # One walker per (tree, row) pair; walkers are dropped once they reach a leaf
+        leaves = np.empty(self.n_trees * n_rows, dtype=np.int32)
+        walkers = np.arange(len(leaves))
+        current = np.repeat(self.roots, n_rows)
+        row_offsets = np.tile(np.arange(n_rows) * n_features, self.n_trees)
+        feature = self.feature[current]
+        while True:
+            # Checked before stepping, so a tree that is a single leaf stops at its root
+            at_leaf = feature < 0
+            if at_leaf.any():
+                leaves[walkers[at_leaf]] = current[at_leaf]
+                at_split = ~at_leaf
+                walkers = walkers[at_split]
+                current = current[at_split]
+                feature = feature[at_split]
+                row_offsets = row_offsets[at_split]
+            if not len(walkers):
+                break
+
+            go_right = flat_X[row_offsets + feature] > self.threshold[current]
+            current = children[2 * current + go_right]
+            feature = self.feature[current]
+        return leaves.reshape(self.n_trees, n_rows)
+
+    def contributions(self, X):
+        # Path decomposition (Saabas): each split on the way to a leaf credits its
+        # feature with the change in node value. Per row, bias + contributions
+        # sums to the prediction. Walkers advance exactly as in leaves().
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        children = self.children.ravel()
+        value = self.value.astype(np.float64, copy=False)
+
+        totals = np.zeros(n_rows * n_features)
+        current = np.repeat(self.roots, n_rows)
+        rows = np.tile(np.arange(n_rows), self.n_trees)
+        feature = self.feature[current]
+        # Single-node trees contribute only to the bias
+        at_split = feature >= 0
+        current, rows, feature = current[at_split], rows[at_split], feature[at_split]
+        while len(current):
+            go_right = flat_X[rows * n_features + feature] > self.threshold[current]
+            child = children[2 * current + go_right]
+            cells = rows * n_features + feature
+            totals += np.bincount(cells, weights=value[child] - value[current], minlength=len(totals))
+            current = child
+            feature = self.feature[current]
+
+            at_split = feature >= 0
+            if not at_split.all():
+                current = current[at_split]
+                rows = rows[at_split]
+                feature = feature[at_split]
+
+        bias = value[self.roots].mean()
+        return bias, totals.reshape(n_rows, n_features) / self.n_trees
+
+    def predict(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        out = np.empty(len(X))
+
+        # Bounded blocks keep the per-walker temporaries small for large batches
+        for start in range(0, len(X), BLOCK_ROWS):
+            leaf_values = self.value[self.leaves(X[start:start + BLOCK_ROWS])]
+
+            # Accumulate tree by tree, in order, exactly like RandomForestRegressor.predict
+            block_out = np.zeros(leaf_values.shape[1])
+            for tree_values in leaf_values:
+                block_out += tree_values
+            out[start:start + BLOCK_ROWS] = block_out / self.n_trees
+        return out
+
+    def arrays(self):
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "children": self.children,
+            "value": self.value,
+            "roots": self.roots,
+            "max_depth": np.array(self.max_depth),
+            "feature_names": np.array(self.feature_names),
+        }
+
+
+def export_forest(model):
+    features, thresholds, children, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+
+        left = np.where(is_leaf, -1, tree.children_left + offset)
+        right = np.where(is_leaf, -1, tree.children_right + offset)
+
+        features.append(np.where(is_leaf, -1, tree.feature))
+        thresholds.append(tree.threshold)
+        children.append(np.stack([left, right], axis=1))
+        values.append(tree.value[:, 0, 0])
+        roots.append(offset)
+
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    return FlatForest(
+        feature=np.concatenate(features).astype(np.int32),
+        threshold=np.concatenate(thresholds).astype(np.float64),
+        children=np.concatenate(children).astype(np.int32),
+        value=np.concatenate(values).astype(np.float64),
+        roots=np.array(roots, dtype=np.int32),
+        max_depth=max_depth,
+        feature_names=model.feature_names_in_,
+    )
+
+
+def save_flat_forest(forest, path=FLAT_MODEL_PATH, source_stamp=None):
+    # One uncompressed .npy file per array so loading is a memory map, not a parse.
+    # Written to a new directory that replaces the old one, never over files that
+    # running processes have mapped. source_stamp: model_stamp() of the model.pkl
+    # the forest was built from, so loaders can tell when that file was replaced.
+    arrays = forest.arrays()
+    meta = {
+        "max_depth": int(arrays.pop("max_depth")),
+        "feature_names": arrays.pop("feature_names").tolist(),
+        "model_stamp": None if source_stamp is None else list(source_stamp),
+    }
+    tmp = temp_sibling(path)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), array)
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    replace_directory(tmp, path)
+
+
+def _map_flat_forest(path):
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+
+    def load(name):
+        # Plain ndarray view over the mapping; pages are read in lazily and shared between processes
+        return np.asarray(np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+
+    forest = FlatForest(
+        feature=load("feature"),
+        threshold=load("threshold"),
+        children=load("children"),
+        value=load("value"),
+        roots=load("roots"),
+        max_depth=meta["max_depth"],
+        feature_names=meta["feature_names"],
+    )
+    return forest, meta
+
+
+def load_flat_forest(path=FLAT_MODEL_PATH, model_path=MODEL_PATH):
+    # The export of the current model_path: retried when the directory is swapped
+    # mid-load, so the arrays always come from one export, and redone from model_path
+    # when it is missing or was made from an earlier model.pkl (compared by stamp,
+    # like dataset.is_fresh does for the CSV). model_path=None loads path as it is.
+    stamp = None if model_path is None else model_stamp(model_path)
+    for _ in range(LOAD_ATTEMPTS):
+        before = directory_id(path)
+        try:
+            forest, meta = _map_flat_forest(path)
+        except FileNotFoundError:
+            forest = None
+        if forest is not None and directory_id(path) == before:
+            if stamp is None or meta.get("model_stamp") == list(stamp):
+                return forest
+            break
+        time.sleep(0.01)
+    if model_path is None:
+        raise FileNotFoundError(f"No flat forest in {path}")
+
+    # Missing or stale (model trained before flat export existed, or model.pkl
+    # replaced by hand): export it once from model.pkl
+    import joblib
+
+    forest = export_forest(joblib.load(model_path))
+    try:
+        save_flat_forest(forest, path, stamp)
+    except OSError:
+        pass
+    return forest
+
+
+def _time_per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    import joblib
+
+    from dataset import load_dataset
+
+    # Export model.pkl, check it predicts identically and compare latency
+    model = joblib.load("model.pkl")
+    forest = export_forest(model)
+    save_flat_forest(forest, source_stamp=model_stamp())
+    print(f"Exported {forest.n_trees} trees ({len(forest.value):,} nodes) to {FLAT_MODEL_PATH}")
+
+    df = load_dataset()
+    X = df[forest.feature_names]
+    expected = model.predict(X)
+    actual = forest.predict(X.to_numpy())
+    print(f"Identical predictions: {np.array_equal(expected, actual)}")
+
+    row_df, row = X.iloc[:1], X.to_numpy()[:1]
+    sk_row = _time_per_call(lambda: model.predict(row_df), 50)
+    flat_row = _time_per_call(lambda: forest.predict(row), 50)
+    print(f"Single row: sklearn {sk_row * 1e3:.3f} ms, flat {flat_row * 1e3:.3f} ms ({sk_row / flat_row:.1f}x)")
+
+    sk_batch = _time_per_call(lambda: model.predict(X), 3)
+    flat_batch = _time_per_call(lambda: forest.predict(X.to_numpy()), 3)
+    print(f"Batch of {len(X):,}: sklearn {len(X) / sk_batch:,.0f} rows/sec, flat {len(X) / flat_batch:,.0f} rows/sec")
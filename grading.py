@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+
+GRADING_PATH = "grading.json"
+
+# Exam score bands (0-100 scale): lower bound and label per language, lowest first.
+# The first band has no lower bound.
+BANDS = [
+    (None, {"en": "Needs Improvement", "ku": "پێویستی بە باشترکردن هەیە"}),
+    (60, {"en": "Average", "ku": "مامناوەند"}),
+    (70, {"en": "Good", "ku": "باش"}),
+    (80, {"en": "Very Good", "ku": "زۆر باش"}),
+    (90, {"en": "Excellent", "ku": "نایاب"}),
+]
+PASS_SCORE = 60
+STATUS = {
+    "fail": {"en": "Fail", "ku": "شکست"},
+    "pass": {"en": "Pass", "ku": "تێپەڕ"},
+}
+LANGUAGES = ["en", "ku"]
+
+
+def round_scores(scores):
+    # Scores to 2 decimals exactly as Python's round() does, so the forms, the lookup
+    # table, batch jobs and bulk upload give a score on the pass mark one label.
+    # ndarray.round differs: it rounds score * 100, which is inexact near a tie
+    # (59.995 becomes 60.0, round() gives 59.99). NaN stays NaN.
+    scores = np.array(scores, dtype=np.float64, ndmin=1)
+    scaled = scores * 100
+    centipoints = np.rint(scaled)
+    ambiguous = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(ambiguous):
+        centipoints.flat[i] = round(round(float(scores.flat[i]), 2) * 100)
+    return centipoints / 100
+
+
+class Banding:
+    # Maps whole arrays of scores to levels and pass/fail labels. Scores are binned
+    # once with searchsorted into band codes, and labels for any language are a
+    # single take() from a small lookup array, so millions of rows are labelled
+    # without a Python loop. NaN scores (rows that were not scored) get "".
+
+    def __init__(self, bands=BANDS, pass_score=PASS_SCORE, status=STATUS):
+        thresholds = [threshold for threshold, _ in bands[1:]]
+        if bands[0][0] is not None or any(b <= a for a, b in zip(thresholds, thresholds[1:])):
+            raise ValueError("Bands must start unbounded and have increasing thresholds")
+        self.thresholds = np.array(thresholds, dtype=np.float64)
+        self.pass_score = pass_score
+        # Last entry is the label for code -1 (missing score)
+        self.level_labels = {
+            lang: np.array([labels[lang] for _, labels in bands] + [""], dtype=object) for lang in LANGUAGES
+        }
+        self.status_labels = {
+            lang: np.array([status["fail"][lang], status["pass"][lang], ""], dtype=object) for lang in LANGUAGES
+        }
+
+    def codes(self, scores):
+        # Band index per score (0 = lowest band), -1 for NaN
+        scores = np.asarray(scores, dtype=np.float64)
+        codes = np.searchsorted(self.thresholds, scores, side="right")
+        codes[np.isnan(scores)] = -1
+        return codes
+
+    def classify(self, scores, language="en"):
+        # (levels, statuses) as object arrays of labels in the given language
+        scores = np.asarray(scores, dtype=np.float64)
+        passed = (scores >= self.pass_score).astype(np.intp)
+        passed[np.isnan(scores)] = -1
+        return (self.level_labels[language].take(self.codes(scores)),
+                self.status_labels[language].take(passed))
+
+    def classify_one(self, score, language="en"):
+        levels, statuses = self.classify([score], language)
+        return levels[0], statuses[0]
+
+
+def load_banding(path=GRADING_PATH):
+    # Bands from a JSON file shaped like the defaults above
+    # ({"bands": [[null, {...}], [60, {...}], ...], "pass_score": 60, "status": {...}}),
+    # or the defaults when the file does not exist
+    try:
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        return Banding()
+    return Banding(
+        [tuple(band) for band in config.get("bands", BANDS)],
+        config.get("pass_score", PASS_SCORE),
+        config.get("status", STATUS),
+    )
+
+
+banding = load_banding()
@@ -0,0 +1,54 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+STATE_PATH = "training_state.json"
+FINGERPRINT_CHUNK = 1_000_000
+# Fewer rows than this give bootstrapped trees of one or two nodes, which only
+# add noise to the forest; incremental runs wait until enough records arrive
+MIN_NEW_RECORDS = 50
+
+
+def dataset_fingerprint(df, n_rows):
+    # Hash of the first n_rows, independent of the dtypes the columns were loaded with,
+    # so an appended dataset keeps the fingerprint of the rows it already had
+    digest = hashlib.sha256(",".join(df.columns).encode("utf-8"))
+    for col in df.columns:
+        values = df[col].to_numpy()
+        for start in range(0, n_rows, FINGERPRINT_CHUNK):
+            stop = min(start + FINGERPRINT_CHUNK, n_rows)
+            digest.update(values[start:stop].astype(np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def load_state(path=STATE_PATH):
+    # Watermark written by training runs from before the model registry; registered
+    # versions keep theirs in meta.json (n_rows, data_hash)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def new_records(df, state):
+    # Rows appended since the last training run
+    watermark = state["watermark"]
+    if len(df) < watermark or dataset_fingerprint(df, watermark) != state["fingerprint"]:
+        raise ValueError("Dataset rows before the watermark have changed; run a full training instead")
+    return df.iloc[watermark:]
+
+
+def grow_forest(model, X_new, y_new, new_trees, retire_trees=0):
+    if len(X_new) < MIN_NEW_RECORDS:
+        raise ValueError(f"Need at least {MIN_NEW_RECORDS} new records to grow trees, got {len(X_new)}")
+    # Warm start keeps the fitted trees and fits only the additional ones on the new data
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + new_trees, n_jobs=-1)
+    model.fit(X_new, y_new)
+
+    if retire_trees:
+        # Trees are appended in training order, so the oldest come first
+        model.estimators_ = model.estimators_[retire_trees:]
+    model.set_params(warm_start=False, n_estimators=len(model.estimators_), n_jobs=None)
+    return model
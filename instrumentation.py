@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Per-stage wall-clock timings shared by every session of the Streamlit process.
+# Off unless APP_TIMINGS=1 (or switched on from the admin panel); when off, the
+# hooks cost one attribute check.
+
+MAX_SAMPLES = 5_000
+QUANTILES = [0.5, 0.9, 0.99]
+
+
+class StageTimings:
+
+    def __init__(self, enabled=False, max_samples=MAX_SAMPLES):
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self._samples = {}
+        self._counts = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def set_enabled(self, enabled):
+        self.enabled = bool(enabled)
+
+    def record(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = deque(maxlen=self.max_samples)
+                self._counts[stage] = 0
+                self._totals[stage] = 0.0
+            self._samples[stage].append(seconds)
+            self._counts[stage] += 1
+            self._totals[stage] += seconds
+
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def lap(self):
+        return Lap(self)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._totals.clear()
+
+    def snapshot(self):
+        # Count and mean over all samples; percentiles over the most recent max_samples
+        with self._lock:
+            stages = {stage: sorted(samples) for stage, samples in self._samples.items()}
+            counts = dict(self._counts)
+            totals = dict(self._totals)
+
+        result = {}
+        for stage, samples in sorted(stages.items()):
+            stats = {"count": counts[stage], "mean_ms": totals[stage] / counts[stage] * 1e3}
+            for q in QUANTILES:
+                index = min(len(samples) - 1, int(q * len(samples)))
+                stats[f"p{q * 100:g}_ms"] = samples[index] * 1e3
+            stats["max_ms"] = samples[-1] * 1e3
+            result[stage] = stats
+        return result
+
+    def text_dump(self):
+        lines = [
+            "# Per-stage timings, milliseconds",
+            f"# enabled={int(self.enabled)} pid={os.getpid()}",
+        ]
+        for stage, stats in self.snapshot().items():
+            for name, value in stats.items():
+                lines.append(f'stage_timing{{stage="{stage}",stat="{name}"}} {value:.6g}')
+        return "\n".join(lines) + "\n"
+
+
+class Lap:
+    # Consecutive stages of one rerun, timed without re-indenting the page code
+
+    def __init__(self, timings):
+        self.timings = timings
+        self.start = self.last = time.perf_counter()
+
+    def done(self, stage):
+        now = time.perf_counter()
+        self.timings.record(stage, now - self.last)
+        self.last = now
+
+    def total(self, stage):
+        self.timings.record(stage, time.perf_counter() - self.start)
+
+
+timings = StageTimings(enabled=os.environ.get("APP_TIMINGS") == "1")
+
+
+def is_admin(token):
+    # The admin panel is shown only for ?admin=<APP_ADMIN_TOKEN>
+    expected = os.environ.get("APP_ADMIN_TOKEN")
+    return bool(expected) and token == expected
@@ -0,0 +1,78 @@
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from schema import load_schema
+
+
+def random_records(schema, n, rng):
+    records = [{} for _ in range(n)]
+    for col in schema["feature_cols"]:
+        info = schema["columns"][col]
+        values = rng.integers(info["min"], info["max"] + 1, size=n)
+        for record, value in zip(records, values.tolist()):
+            record[col] = value
+    return records
+
+
+def post_json(url, body):
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request) as response:
+        return response.status, json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate concurrent load against the prediction API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=1, help="Records per request (default: 1)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    records = random_records(load_schema(), args.requests * args.batch_size, rng)
+    if args.batch_size == 1:
+        payloads = records
+    else:
+        payloads = [{"records": records[i:i + args.batch_size]} for i in range(0, len(records), args.batch_size)]
+
+    def send(payload):
+        start = time.perf_counter()
+        try:
+            status, _ = post_json(f"{args.url}/predict", payload)
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            status = "connection error"
+        return status, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(send, payloads))
+    elapsed = time.perf_counter() - start
+
+    statuses = [status for status, _ in results]
+    latencies = np.array([latency for _, latency in results]) * 1e3
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{len(payloads):,} requests in {elapsed:.2f}s ({len(payloads) / elapsed:,.0f} req/sec, "
+          f"{len(records) / elapsed:,.0f} rows/sec)")
+    print(f"Client latency: p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+    print(f"Status codes: {dict((str(s), statuses.count(s)) for s in set(statuses))}")
+
+    try:
+        with urllib.request.urlopen(f"{args.url}/metrics") as response:
+            print("Server metrics:", json.dumps(json.loads(response.read()), indent=2))
+    except OSError as e:
+        print(f"Could not fetch server metrics: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from grading import round_scores
+from prediction_cache import model_stamp
+from schema import load_schema
+
+LOOKUP_TABLE_PATH = "model_table"
+MAX_CELLS = 4_000_000
+BUILD_BLOCK = 200_000
+
+
+class LookupTable:
+    # Scores for every integer input inside a box (one inclusive [low, high] range
+    # per feature), stored in C order as hundredths of a point. A prediction inside
+    # the box is one index computation and one array read; anything else falls
+    # back to the forest.
+
+    def __init__(self, feature_names, low, high, scores, stamp):
+        self.feature_names = list(feature_names)
+        self.low = np.asarray(low, dtype=np.float32)
+        self.high = np.asarray(high, dtype=np.float32)
+        self.shape = tuple(int(n) for n in self.high - self.low + 1)
+        self.strides = np.array([int(np.prod(self.shape[i + 1:])) for i in range(len(self.shape))], dtype=np.int64)
+        self.scores = scores
+        self.stamp = stamp
+
+    def lookup(self, X):
+        # Scores rounded to 2 decimals (NaN outside the table) and the mask of hits
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        hits = ((X >= self.low) & (X <= self.high) & (X == np.rint(X))).all(axis=1)
+        scores = np.full(len(X), np.nan)
+        if hits.any():
+            cells = ((X[hits] - self.low).astype(np.int64) * self.strides).sum(axis=1)
+            scores[hits] = self.scores[cells] / 100
+        return scores, hits
+
+    def lookup_row(self, row):
+        score, hit = self.lookup(row)
+        return float(score[0]) if hit[0] else None
+
+
+def hot_region(X, low, high, max_cells):
+    # Grow a box from each feature's most common value, one step at a time, picking
+    # the extension that covers the most rows per unit of growth in log(cells)
+    n_rows, n_features = X.shape
+    lo = np.array([np.bincount(X[:, j] - low[j]).argmax() + low[j] for j in range(n_features)])
+    hi = lo.copy()
+    cells = 1
+
+    while True:
+        inside = (X >= lo) & (X <= hi)
+        n_outside = n_features - inside.sum(axis=1)
+        best = None
+        for j in range(n_features):
+            width = hi[j] - lo[j] + 1
+            if cells // width * (width + 1) > max_cells:
+                continue
+            # Rows whose only coordinate outside the box is feature j
+            only_j = (n_outside == 1) & ~inside[:, j]
+            for side, value in [("lo", lo[j] - 1), ("hi", hi[j] + 1)]:
+                if not low[j] <= value <= high[j]:
+                    continue
+                gained = np.count_nonzero(only_j & (X[:, j] == value))
+                # Mass of the new slice breaks ties while no row is fully covered yet
+                mass = np.count_nonzero(X[:, j] == value) / n_rows
+                priority = (gained + mass) / np.log((width + 1) / width)
+                if best is None or priority > best[0]:
+                    best = (priority, j, side, value)
+        if best is None:
+            break
+        _, j, side, value = best
+        cells = cells // (hi[j] - lo[j] + 1)
+        if side == "lo":
+            lo[j] = value
+        else:
+            hi[j] = value
+        cells *= hi[j] - lo[j] + 1
+
+    coverage = float(((X >= lo) & (X <= hi)).all(axis=1).mean())
+    return lo, hi, coverage
+
+
+def rounded_centipoints(scores):
+    # round_scores() * 100 as integers, so table hits equal evaluate()
+    return np.rint(round_scores(scores) * 100).astype(np.uint16)
+
+
+def build_table(model, feature_names, lo, hi, block=BUILD_BLOCK, progress=None):
+    import pandas as pd
+
+    shape = tuple(int(n) for n in hi - lo + 1)
+    n_cells = int(np.prod(shape))
+    scores = np.empty(n_cells, dtype=np.uint16)
+    for start in range(0, n_cells, block):
+        stop = min(start + block, n_cells)
+        grid = np.stack(np.unravel_index(np.arange(start, stop), shape), axis=1) + lo
+        X = pd.DataFrame(grid.astype(np.float32), columns=feature_names)
+        scores[start:stop] = rounded_centipoints(model.predict(X))
+        if progress:
+            progress(stop, n_cells)
+    return scores
+
+
+def save_lookup_table(table, path=LOOKUP_TABLE_PATH, **report):
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "scores.npy"), table.scores)
+    meta = {
+        "feature_names": table.feature_names,
+        "low": table.low.astype(int).tolist(),
+        "high": table.high.astype(int).tolist(),
+        "stamp": list(table.stamp) if table.stamp else None,
+        **report,
+    }
+    # Written last, so an interrupted build is never picked up
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_lookup_table(path=LOOKUP_TABLE_PATH, stamp=None):
+    # The table for the current model, or None when missing or built for another model
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if stamp is not None and meta["stamp"] != list(stamp):
+        return None
+    scores = np.load(os.path.join(path, "scores.npy"), mmap_mode="r")
+    return LookupTable(meta["feature_names"], meta["low"], meta["high"], scores,
+                       tuple(meta["stamp"]) if meta["stamp"] else None)
+
+
+def _latency_us(fn, repeat=500):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    import joblib
+
+    from dataset import load_dataset
+    from flat_forest import load_flat_forest
+
+    parser = argparse.ArgumentParser(description="Precompute model scores over the hot region of the input space.")
+    parser.add_argument("--max-cells", type=int, default=MAX_CELLS,
+                        help=f"Table size budget in cells, 2 bytes each (default: {MAX_CELLS:,})")
+    parser.add_argument("--output", default=LOOKUP_TABLE_PATH, help=f"Output directory (default: {LOOKUP_TABLE_PATH})")
+    args = parser.parse_args()
+
+    schema = load_schema()
+    feature_names = schema["feature_cols"]
+    columns = schema["columns"]
+    not_integral = [col for col in feature_names if not columns[col]["dtype"].startswith("int")]
+    if not_integral:
+        parser.error(f"features are not integers, so the input space is not discrete: {', '.join(not_integral)}")
+
+    low = np.array([columns[col]["min"] for col in feature_names])
+    high = np.array([columns[col]["max"] for col in feature_names])
+    space = int(np.prod((high - low + 1).astype(float)))
+    df = load_dataset()
+    X = df[feature_names].to_numpy(np.int64)
+
+    start = time.perf_counter()
+    if space <= args.max_cells:
+        lo, hi, coverage = low, high, 1.0
+    else:
+        lo, hi, coverage = hot_region(X, low, high, args.max_cells)
+    n_cells = int(np.prod(hi - lo + 1))
+    print(f"Input space: {space:,.0f} cells; table: {n_cells:,} cells covering {coverage:.2%} of dataset rows")
+    for col, a, b, mn, mx in zip(feature_names, lo, hi, low, high):
+        print(f"  {col:<22} {a:>4}..{b:<4} of {mn}..{mx}")
+
+    model = joblib.load("model.pkl")
+    model.set_params(n_jobs=-1)
+    stamp = model_stamp()
+
+    def progress(done, total):
+        elapsed = time.perf_counter() - start
+        print(f"\r  scored {done:,}/{total:,} cells ({done / elapsed:,.0f} cells/sec)", end="", flush=True)
+
+    scores = build_table(model, feature_names, lo, hi, progress=progress)
+    build_seconds = time.perf_counter() - start
+    table = LookupTable(feature_names, lo, hi, scores, stamp)
+    save_lookup_table(table, args.output, cells=n_cells, coverage=coverage, build_seconds=build_seconds)
+    print(f"\nBuilt in {build_seconds:.1f}s -> {args.output}/ ({scores.nbytes / 1e6:.1f} MB)")
+
+    # Lookup vs live prediction on a row inside the table
+    model.set_params(n_jobs=None)
+    forest = load_flat_forest()
+    table = load_lookup_table(args.output, stamp)
+    row = lo.astype(np.float32)
+    row_df = df[feature_names].iloc[:1].copy()
+    row_df.iloc[0] = row
+    expected = round(float(forest.predict(row)[0]), 2)
+    print(f"Table agrees with the forest on a sample cell: {table.lookup_row(row) == expected}")
+    print(f"Single-row latency: table {_latency_us(lambda: table.lookup_row(row)):.1f} us, "
+          f"flat forest {_latency_us(lambda: forest.predict(row)):.1f} us, "
+          f"sklearn {_latency_us(lambda: model.predict(row_df), 50):.1f} us")
+    _, hits = table.lookup(X)
+    print(f"Dataset rows answered from the table: {hits.mean():.2%}")
+
+
+if __name__ == "__main__":
+    main()
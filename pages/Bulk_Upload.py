@@ -0,0 +1,122 @@
+import atexit
+import os
+import shutil
+import tempfile
+import time
+
+import streamlit as st
+
+from bulk_upload import UPLOAD_CHUNKSIZE, missing_columns, read_chunks, score_chunk
+from prediction_service import get_service
+
+PREVIEW_ROWS = 200
+KEEP_RESULTS = 20  # scored files kept on disk for the whole server; older ones are deleted
+
+# Page configuration
+st.set_page_config(
+    page_title="Bulk Upload",
+    page_icon="📤",
+    layout="wide",
+    initial_sidebar_state="collapsed"
+)
+
+
+@st.cache_resource
+def results_dir():
+    # One directory per server process, removed when it exits
+    path = tempfile.mkdtemp(prefix="bulk_upload_")
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def prune_results(path, keep=KEEP_RESULTS):
+    # Sessions that are closed never clean up after themselves, so only the newest
+    # files are kept (names start with the creation time)
+    for name in sorted(os.listdir(path), reverse=True)[keep:]:
+        try:
+            os.unlink(os.path.join(path, name))
+        except OSError:
+            pass
+
+
+def discard(result):
+    try:
+        os.unlink(result["path"])
+    except OSError:
+        pass
+
+
+st.title("📤 Bulk Upload")
+st.caption("Upload a class roster as CSV or Excel to predict exam scores for every student at once. "
+           "Columns use the same names as the training data (StudyHours, Attendance, ...); a missing "
+           "column is filled with its training average.")
+
+uploaded = st.file_uploader("Roster file", type=["csv", "xlsx"])
+if uploaded is None:
+    st.stop()
+
+result = st.session_state.get("bulk_result")
+if result is not None and result["file_id"] != uploaded.file_id:
+    discard(result)
+    result = st.session_state["bulk_result"] = None
+
+if st.button("🔮 Score file", type="primary", use_container_width=True):
+    service = get_service()
+    progress = st.progress(0.0, text="Reading file...")
+    status = st.empty()
+    preview = st.empty()
+
+    # Scored chunks go straight to a temporary file, so memory stays bounded by one chunk
+    out = tempfile.NamedTemporaryFile("w", prefix=f"{time.time_ns()}-", suffix=".csv", dir=results_dir(),
+                                      delete=False, newline="", encoding="utf-8")
+    rows = invalid = 0
+    shown = []
+    start = time.perf_counter()
+    try:
+        with out:
+            for i, (chunk, fraction) in enumerate(read_chunks(uploaded, uploaded.name, UPLOAD_CHUNKSIZE)):
+                if i == 0:
+                    missing = missing_columns(chunk, service.feature_cols)
+                    if missing:
+                        st.warning(f"Filled with training averages: {', '.join(missing)}")
+                scored = score_chunk(service, chunk)
+                scored.to_csv(out, header=(i == 0), index=False)
+
+                rows += len(scored)
+                invalid += int((scored["Error"] != "").sum())
+                if len(shown) < PREVIEW_ROWS:
+                    shown.extend(scored.head(PREVIEW_ROWS - len(shown)).to_dict("records"))
+                elapsed = time.perf_counter() - start
+                progress.progress(fraction, text=f"Scored {rows:,} rows ({rows / elapsed:,.0f} rows/sec)")
+                status.caption(f"{rows - invalid:,} scored, {invalid:,} invalid so far")
+                preview.dataframe(shown, use_container_width=True, hide_index=True)
+    except Exception as e:
+        os.unlink(out.name)
+        progress.empty()
+        st.error(f"❌ Could not read the file: {e}")
+        st.stop()
+
+    progress.progress(1.0, text=f"Done: {rows:,} rows in {time.perf_counter() - start:.1f}s")
+    status.empty()
+    preview.empty()
+    if result is not None:
+        discard(result)
+    prune_results(results_dir())
+    result = {"file_id": uploaded.file_id, "path": out.name, "rows": rows, "invalid": invalid, "preview": shown}
+    st.session_state["bulk_result"] = result
+
+if result is not None:
+    col1, col2 = st.columns(2)
+    col1.metric("Scored rows", f"{result['rows'] - result['invalid']:,}")
+    col2.metric("Invalid rows", f"{result['invalid']:,}")
+    if result["invalid"]:
+        st.info("Invalid rows are kept in the download with the reason in the Error column.")
+    st.dataframe(result["preview"], use_container_width=True, hide_index=True)
+
+    base_name = os.path.splitext(uploaded.name)[0]
+    try:
+        with open(result["path"], "rb") as f:
+            st.download_button("⬇️ Download scored file", f, file_name=f"{base_name}_scored.csv",
+                               mime="text/csv", use_container_width=True)
+    except FileNotFoundError:
+        st.info("The scored file has expired. Score the file again to download it.")
@@ -0,0 +1,103 @@
+import json
+
+import streamlit as st
+
+from cohorts import VALUE_LABELS, cube_version, get_cube
+
+# Page configuration
+st.set_page_config(
+    page_title="Cohort Analytics",
+    page_icon="📊",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+st.title("📊 Cohort Analytics")
+st.caption("Exam score distributions by student group. Statistics are aggregated once per dataset and model "
+           "version; filters and groupings are combined from them without rescanning student records.")
+
+
+@st.cache_resource(show_spinner="Aggregating the dataset...")
+def load_cube(version_key):
+    # version_key changes with the dataset or model, so a stale cube is never reused
+    return get_cube()
+
+
+def label(dim, value):
+    return VALUE_LABELS.get(dim, {}).get(value, str(value))
+
+
+cube = load_cube(json.dumps(cube_version()))
+
+# Filters: a dimension left at "all values" is not filtered
+with st.sidebar:
+    st.header("Filters")
+    filters = {}
+    for dim in cube.dims:
+        levels = cube.levels[dim]
+        chosen = st.multiselect(dim, levels, default=levels, format_func=lambda v, d=dim: label(d, v),
+                                key=f"filter_{dim}")
+        if len(chosen) < len(levels):
+            filters[dim] = chosen
+
+summary = cube.summary(filters)
+if summary["count"] == 0:
+    st.warning("No students match these filters.")
+    st.stop()
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Students", f"{summary['count']:,}")
+col2.metric("Mean exam score", f"{summary['actual_mean']:.2f}")
+col3.metric("Mean predicted score", f"{summary['predicted_mean']:.2f}")
+col4.metric("Mean absolute error", f"{summary['mae']:.2f}")
+
+# Drill-down: group by one dimension, optionally split by a second
+col1, col2 = st.columns(2)
+with col1:
+    group_by = st.selectbox("Group by", cube.dims, key="group_by")
+with col2:
+    split_by = st.selectbox("Split by", ["(none)"] + [dim for dim in cube.dims if dim != group_by], key="split_by")
+by = [group_by] if split_by == "(none)" else [group_by, split_by]
+
+table = [
+    {
+        **{dim: label(dim, row[dim]) for dim in by},
+        "Students": row["count"],
+        "Mean score": round(row["actual_mean"], 2),
+        "Std": round(row["actual_std"], 2),
+        "Mean predicted": round(row["predicted_mean"], 2),
+        "MAE": round(row["mae"], 2),
+    }
+    for row in cube.group(by, filters)
+]
+
+encoding = {
+    "x": {"field": group_by, "type": "nominal", "sort": None},
+    "y": {"field": "Mean score", "type": "quantitative", "scale": {"zero": False}},
+    "tooltip": [{"field": field} for field in table[0]],
+}
+if len(by) == 2:
+    encoding["xOffset"] = {"field": split_by, "sort": None}
+    encoding["color"] = {"field": split_by, "type": "nominal", "sort": None}
+st.vega_lite_chart(table, {"mark": "bar", "encoding": encoding}, use_container_width=True)
+st.dataframe(table, hide_index=True, use_container_width=True)
+
+# Score distribution of the filtered cohort, actual vs predicted
+st.markdown("### Score distribution")
+histogram = cube.histogram(filters)
+bins = histogram["bins"]
+bars = [
+    {"Score": f"{low}-{high - 1 if i < len(bins) - 2 else high}", "Source": source, "Students": count}
+    for source, counts in [("Actual", histogram["actual"]), ("Predicted", histogram["predicted"])]
+    for i, (low, high, count) in enumerate(zip(bins[:-1], bins[1:], counts))
+]
+st.vega_lite_chart(bars, {
+    "mark": "bar",
+    "encoding": {
+        "x": {"field": "Score", "type": "ordinal", "sort": None},
+        "xOffset": {"field": "Source"},
+        "y": {"field": "Students", "type": "quantitative"},
+        "color": {"field": "Source", "type": "nominal"},
+        "tooltip": [{"field": "Score"}, {"field": "Source"}, {"field": "Students"}],
+    },
+}, use_container_width=True)
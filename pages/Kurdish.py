@@ -1,6 +1,12 @@
 import streamlit as st
-import pandas as pd
-import joblib
+
+from audit_log import log_prediction
+from instrumentation import timings
+from prediction_service import get_schema, get_service, warm_up_in_background
+from ui_components import show_attributions, show_sidebar_panels
+
+# Per-stage timings of this rerun (recorded only when instrumentation is on)
+lap = timings.lap()
 
 # Page configuration
 st.set_page_config(
@@ -170,24 +176,13 @@ with col_nav3:
 if 'page' not in st.session_state:
     st.session_state.page = "kurdish"
 
-# Load model and dataset
-@st.cache_resource
-def load_model():
-    return joblib.load("model.pkl")
-
-@st.cache_data
-def load_dataset():
-    df = pd.read_csv("merged_dataset.csv")
-    return df
+lap.done("rerun.layout")
 
-model = load_model()
-df = load_dataset()
-target_col = "ExamScore"
-feature_cols = df.drop([target_col, "FinalGrade"], axis=1).columns.tolist()
-
-# Helper function to get unique values for selectboxes
-def get_unique_values(series):
-    return sorted(series.unique().tolist())
+# Build the form from the small feature schema; the model loads in the background
+# while the form is being filled in and is only required on submit
+columns = get_schema()["columns"]
+warm_up_in_background()
+lap.done("rerun.schema")
 
 # Kurdish translations
 translations = {
@@ -197,14 +192,11 @@ translations = {
     "yes_no": {0: "نەخێر", 1: "بەڵێ"},
     "resource": {0: "نزم", 1: "مامناوەند", 2: "بەرز"},
     "stress": {0: "نزم", 1: "مامناوەند", 2: "بەرز"},
-    "levels": {
-        "Excellent": "نایاب",
-        "Very Good": "زۆر باش",
-        "Good": "باش",
-        "Average": "مامناوەند",
-        "Needs Improvement": "پێویستی بە باشترکردن هەیە"
-    },
-    "pass_fail": {"Pass": "تێپەڕ", "Fail": "شکست"}
+    "attributions": {
+        "title": "🔍 بۆچی ئەم نمرەیە؟",
+        "caption": "لە تێکڕای پێشبینی {bias:.2f}ەوە، هەر ستوونێک نیشان دەدات هەر هۆکارێک چەندە نمرەکەی بەرز یان نزم کردووەتەوە.",
+        "axis": "خاڵی زیادکراو بۆ نمرە",
+    }
 }
 
 st.markdown("---")
@@ -230,9 +222,9 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">تەمەنت چەندە؟</p>', unsafe_allow_html=True)
         user_data['Age'] = st.number_input(
             "تەمەن بنووسە:",
-            min_value=int(df['Age'].min()),
-            max_value=int(df['Age'].max()),
-            value=int(df['Age'].mean()),
+            min_value=columns['Age']['min'],
+            max_value=columns['Age']['max'],
+            value=int(columns['Age']['mean']),
             step=1,
             key="age_kur",
             label_visibility="collapsed"
@@ -242,7 +234,7 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">شێوازی فێربوونت چییە؟</p>', unsafe_allow_html=True)
         learning_style_selected = st.selectbox(
             "هەڵبژاردن:",
-            options=get_unique_values(df['LearningStyle']),
+            options=columns['LearningStyle']['values'],
             format_func=lambda x: translations["learning_style"].get(x, f"شێواز {x}"),
             key="learning_style_kur",
             label_visibility="collapsed"
@@ -252,7 +244,7 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">ئاستی هاندانت چەندە؟</p>', unsafe_allow_html=True)
         motivation_selected = st.selectbox(
             "هەڵبژاردن:",
-            options=get_unique_values(df['Motivation']),
+            options=columns['Motivation']['values'],
             format_func=lambda x: translations["motivation"].get(x, f"ئاست {x}"),
             key="motivation_kur",
             label_visibility="collapsed"
@@ -269,9 +261,9 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">چەند کاتژمێر لە هەفتەیەکدا دەخوێنیتەوە؟</p>', unsafe_allow_html=True)
         user_data['StudyHours'] = st.number_input(
             "کاتژمێر بنووسە:",
-            min_value=int(df['StudyHours'].min()),
-            max_value=int(df['StudyHours'].max()),
-            value=int(df['StudyHours'].mean()),
+            min_value=columns['StudyHours']['min'],
+            max_value=columns['StudyHours']['max'],
+            value=int(columns['StudyHours']['mean']),
             step=1,
             key="study_hours_kur",
             label_visibility="collapsed"
@@ -279,9 +271,9 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">ڕێژەی بەشداریکردنت چەندە؟</p>', unsafe_allow_html=True)
         user_data['Attendance'] = st.number_input(
             "ڕێژەی بەشداری (%):",
-            min_value=int(df['Attendance'].min()),
-            max_value=int(df['Attendance'].max()),
-            value=int(df['Attendance'].mean()),
+            min_value=columns['Attendance']['min'],
+            max_value=columns['Attendance']['max'],
+            value=int(columns['Attendance']['mean']),
             step=1,
             key="attendance_kur",
             label_visibility="collapsed"
@@ -289,9 +281,9 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">ڕێژەی تەواوکردنی ئەرکەکانت چەندە؟</p>', unsafe_allow_html=True)
         user_data['AssignmentCompletion'] = st.number_input(
             "ڕێژەی تەواوکردن (%):",
-            min_value=int(df['AssignmentCompletion'].min()),
-            max_value=int(df['AssignmentCompletion'].max()),
-            value=int(df['AssignmentCompletion'].mean()),
+            min_value=columns['AssignmentCompletion']['min'],
+            max_value=columns['AssignmentCompletion']['max'],
+            value=int(columns['AssignmentCompletion']['mean']),
             step=1,
             key="assignment_kur",
             label_visibility="collapsed"
@@ -301,9 +293,9 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">چەند کۆرسی ئۆنلاین وەردەگریت؟</p>', unsafe_allow_html=True)
         user_data['OnlineCourses'] = st.number_input(
             "ژمارە بنووسە:",
-            min_value=int(df['OnlineCourses'].min()),
-            max_value=int(df['OnlineCourses'].max()),
-            value=int(df['OnlineCourses'].mean()),
+            min_value=columns['OnlineCourses']['min'],
+            max_value=columns['OnlineCourses']['max'],
+            value=int(columns['OnlineCourses']['mean']),
             step=1,
             key="online_courses_kur",
             label_visibility="collapsed"
@@ -311,7 +303,7 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">بەشداری لە گفتوگۆکاندا دەکەیت؟</p>', unsafe_allow_html=True)
         discussion_selected = st.selectbox(
             "هەڵبژاردن:",
-            options=get_unique_values(df['Discussions']),
+            options=columns['Discussions']['values'],
             format_func=lambda x: translations["yes_no"].get(x, "نەزانراو"),
             key="discussions_kur",
             label_visibility="collapsed"
@@ -320,7 +312,7 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">بەشداری لە چالاکییەکانی دەرەوەدا دەکەیت؟</p>', unsafe_allow_html=True)
         extracurricular_selected = st.selectbox(
             "هەڵبژاردن:",
-            options=get_unique_values(df['Extracurricular']),
+            options=columns['Extracurricular']['values'],
             format_func=lambda x: translations["yes_no"].get(x, "نەزانراو"),
             key="extracurricular_kur",
             label_visibility="collapsed"
@@ -337,7 +329,7 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">ئاستی دەستگەیشتنت بە سەرچاوەکان چەندە؟</p>', unsafe_allow_html=True)
         resource_selected = st.selectbox(
             "هەڵبژاردن:",
-            options=get_unique_values(df['Resources']),
+            options=columns['Resources']['values'],
             format_func=lambda x: translations["resource"].get(x, f"ئاست {x}"),
             key="resources_kur",
             label_visibility="collapsed"
@@ -346,7 +338,7 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">دەستگەیشتن بە ئینتەرنێتت هەیە؟</p>', unsafe_allow_html=True)
         internet_selected = st.selectbox(
             "هەڵبژاردن:",
-            options=get_unique_values(df['Internet']),
+            options=columns['Internet']['values'],
             format_func=lambda x: translations["yes_no"].get(x, "نەزانراو"),
             key="internet_kur",
             label_visibility="collapsed"
@@ -357,7 +349,7 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">تەکنەلۆژیای پەروەردەیی بەکاردەهێنیت؟</p>', unsafe_allow_html=True)
         edutech_selected = st.selectbox(
             "هەڵبژاردن:",
-            options=get_unique_values(df['EduTech']),
+            options=columns['EduTech']['values'],
             format_func=lambda x: translations["yes_no"].get(x, "نەزانراو"),
             key="edutech_kur",
             label_visibility="collapsed"
@@ -366,7 +358,7 @@ with st.form("prediction_form_kurdish"):
         st.markdown('<p class="field-label">ئاستی فشاری دەروونیت چەندە؟</p>', unsafe_allow_html=True)
         stress_selected = st.selectbox(
             "هەڵبژاردن:",
-            options=get_unique_values(df['StressLevel']),
+            options=columns['StressLevel']['values'],
             format_func=lambda x: translations["stress"].get(x, f"ئاست {x}"),
             key="stress_kur",
             label_visibility="collapsed"
@@ -377,38 +369,17 @@ with st.form("prediction_form_kurdish"):
     st.markdown("---")
     submitted = st.form_submit_button("🔮 پێشبینی نمرەی تاقیکردنەوە", use_container_width=True, type="primary")
 
+lap.done("rerun.form")
 if submitted:
     try:
-        # Convert input to DataFrame
-        input_df = pd.DataFrame([user_data])
-        
-        # Ensure all expected columns are present in the correct order
-        for col in feature_cols:
-            if col not in input_df.columns:
-                # Add missing columns with default values (mean for numeric)
-                input_df[col] = df[col].mean()
-        
-        # Reorder columns to match model expectations
-        input_df = input_df[feature_cols]
-
-        # Make prediction (no encoding needed as all features are already numeric)
-        prediction = model.predict(input_df)[0]
-        exam_score = round(prediction, 2)
-        
-        # Determine performance level based on exam score (0-100 scale)
-        if exam_score >= 90:
-            level = "نایاب"
-        elif exam_score >= 80:
-            level = "زۆر باش"
-        elif exam_score >= 70:
-            level = "باش"
-        elif exam_score >= 60:
-            level = "مامناوەند"
-        else:
-            level = "پێویستی بە باشترکردن هەیە"
-        
-        # Determine pass/fail status
-        pass_status = "تێپەڕ" if exam_score >= 60 else "شکست"
+        # Predict through the shared service (fills missing columns with training means)
+        service = get_service()
+        result = service.evaluate([user_data], language="ku")[0]
+        log_prediction(service, user_data, result, "kurdish_page")
+        lap.done("rerun.predict")
+        exam_score = result["score"]
+        level = result["level"]
+        pass_status = result["status"]
         
         # Display result with improved styling
         st.markdown("---")
@@ -421,6 +392,8 @@ if submitted:
                 <p style="font-size: 16px; margin-top: 12px; opacity: 0.95;">نمرەی پێشبینیکراو (لە ١٠٠)</p>
             </div>
         """, unsafe_allow_html=True)
+        show_attributions(service.explain([user_data])[0], translations["attributions"])
+        lap.done("rerun.render")
         
     except Exception as e:
         st.error(f"❌ هەڵە لە پێشبینی کردندا: {str(e)}")
@@ -450,3 +423,8 @@ if st.session_state.get('page') == "academic":
         st.session_state.page = "kurdish"
         st.rerun()
 
+
+# Prediction cache counters and admin timings in the sidebar
+show_sidebar_panels()
+
+lap.total("rerun.total")
@@ -0,0 +1,68 @@
+import os
+import threading
+from collections import OrderedDict
+
+MODEL_PATH = "model.pkl"
+FLAT_MODEL_PATH = "model_flat"  # flat_forest.py export of MODEL_PATH
+
+
+def model_stamp(path=MODEL_PATH):
+    # Changes whenever train.py rewrites the model
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class PredictionCache:
+    # LRU cache of predictions keyed on the ordered feature vector. Form inputs
+    # are small integers, so identical profiles repeat a lot across sessions.
+
+    def __init__(self, maxsize=10_000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stamp = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def predict(self, model, row, stamp):
+        key = tuple(row)
+        with self._lock:
+            if stamp != self._stamp:
+                # A new model was trained: every cached score is stale
+                self._entries.clear()
+                self._stamp = stamp
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        prediction = float(model.predict([row])[0])
+
+        with self._lock:
+            if stamp == self._stamp:
+                self._entries[key] = prediction
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return prediction
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
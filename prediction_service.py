@@ -0,0 +1,330 @@
+import threading
+import time
+
+from instrumentation import timings
+from prediction_cache import FLAT_MODEL_PATH, MODEL_PATH, PredictionCache, model_stamp
+from registry import active_version, artifact_paths, version_dir
+from schema import SCHEMA_PATH, load_schema
+
+# NumPy, pandas and the model are imported lazily so that pages can render their
+# forms from the schema before paying for the heavy imports and model load
+
+# How often a running process looks for a newly activated model version (seconds)
+CHECK_INTERVAL = 1.0
+# Batches at least this large are scored by scikit-learn's compiled trees (identical
+# scores). The flat forest wins on small batches and single rows, but its NumPy walk
+# reaches only about a quarter of sklearn's throughput at thousands of rows.
+SKLEARN_BATCH_ROWS = 512
+
+
+class PredictionService:
+    # Owns the model, feature schema and prediction cache for one trained model.
+    # Both Streamlit pages share the same instance through get_service().
+
+    def __init__(self, source=None):
+        import numpy as np
+
+        from flat_forest import load_flat_forest
+        from lookup_table import load_lookup_table
+
+        # source: ("version", n) for a registered version, ("file", stamp) for the
+        # working-directory artifacts; see model_source()
+        self.source = source or model_source()
+        self.version = self.source[1] if self.source[0] == "version" else None
+        paths = _source_paths(self.source)
+        self.model_path = paths["model"]
+        self.stamp = model_stamp(self.model_path)
+        self.model = load_flat_forest(paths["flat"], paths["model"])
+        # Precomputed scores for the hot region, if built for this model by lookup_table.py
+        self.table = load_lookup_table(stamp=self.stamp)
+        self.schema = load_schema(paths["schema"])
+        self.feature_cols = self.schema["feature_cols"]
+        self.columns = self.schema["columns"]
+        self.defaults = {col: info["mean"] for col, info in self.columns.items()}
+        self.cache = PredictionCache()
+        self.batch_model = None
+        self._batch_model_thread = None
+        self._batch_model_lock = threading.Lock()
+
+        # Model column positions and a row of training means in model order; a request
+        # copies the row and overwrites the fields it provides (the forest compares in
+        # float32, so the row is built in float32 directly)
+        self.index = {col: i for i, col in enumerate(self.feature_cols)}
+        self.default_row = np.array([self.defaults[col] for col in self.feature_cols], dtype=np.float32)
+
+    def _unknown_features(self, keys):
+        unknown = set(keys) - self.index.keys()
+        if unknown:
+            raise ValueError(f"Unknown features: {', '.join(sorted(unknown))}")
+
+    def assemble_row(self, record):
+        import numpy as np
+
+        # Single form submission: no pandas, one small copy
+        row = self.default_row.copy()
+        try:
+            for col, value in record.items():
+                row[self.index[col]] = value
+        except KeyError:
+            self._unknown_features(record)
+        except (TypeError, ValueError):
+            raise ValueError(f"{col} must be a number") from None
+        if not np.isfinite(row).all():
+            raise ValueError("Features must be finite numbers")
+        return row
+
+    def assemble(self, records):
+        import numpy as np
+
+        # Validated batch: one column at a time, missing fields take the training mean
+        present = set().union(*records)
+        self._unknown_features(present)
+        X = np.tile(self.default_row, (len(records), 1))
+        for col in present:
+            j = self.index[col]
+            default = self.default_row[j]
+            try:
+                values = np.array([record.get(col, default) for record in records], dtype=np.float64)
+            except (TypeError, ValueError):
+                raise ValueError(f"{col} must be a number") from None
+            if not np.isfinite(values).all():
+                raise ValueError(f"{col} must be a finite number")
+            X[:, j] = values
+        return X
+
+    def predict(self, records):
+        import numpy as np
+
+        if len(records) == 1:
+            with timings.timed("predict.assemble"):
+                row = self.assemble_row(records[0])
+            if self.table is not None:
+                with timings.timed("predict.table"):
+                    score = self.table.lookup_row(row)
+                if score is not None:
+                    return np.array([score])
+            with timings.timed("predict.model"):
+                return np.array([self.cache.predict(self.model, row, self.stamp)])
+
+        with timings.timed("predict.assemble"):
+            X = self.assemble(records)
+        return self.predict_array(X)
+
+    def predict_array(self, X):
+        # Rows already in model column order
+        if self.table is None:
+            with timings.timed("predict.model"):
+                return self._predict_rows(X)
+
+        # Rows inside the table are read from it; the forest scores the rest
+        with timings.timed("predict.table"):
+            scores, hits = self.table.lookup(X)
+        if not hits.all():
+            with timings.timed("predict.model"):
+                scores[~hits] = self._predict_rows(X[~hits])
+        return scores
+
+    def _predict_rows(self, X):
+        if len(X) < SKLEARN_BATCH_ROWS:
+            return self.model.predict(X)
+        model = self.batch_model
+        if model is None:
+            # The flat forest scores large batches until the sklearn model has loaded
+            self._load_batch_model()
+            return self.model.predict(X)
+        import pandas as pd
+
+        return model.predict(pd.DataFrame(X, columns=self.feature_cols))
+
+    def _load_batch_model(self):
+        # model.pkl is only needed once large batches arrive (bulk upload, API
+        # batches), so it is loaded in the background on the first one
+        with self._batch_model_lock:
+            if self._batch_model_thread is None:
+                self._batch_model_thread = threading.Thread(target=self._read_batch_model, daemon=True)
+                self._batch_model_thread.start()
+
+    def _read_batch_model(self):
+        import joblib
+
+        # Checked on both sides of the load: a model.pkl replaced since this service
+        # was built belongs to the next one, and the flat forest keeps scoring
+        if model_stamp(self.model_path) != self.stamp:
+            return
+        try:
+            model = joblib.load(self.model_path)
+        except Exception:
+            return
+        if model_stamp(self.model_path) == self.stamp:
+            model.set_params(n_jobs=None)
+            self.batch_model = model
+
+    def explain(self, records):
+        # Per-feature contributions to each prediction, largest effect first
+        import numpy as np
+
+        X = self.assemble_row(records[0])[None, :] if len(records) == 1 else self.assemble(records)
+        with timings.timed("predict.explain"):
+            bias, contributions = self.model.contributions(X)
+
+        explanations = []
+        for row in contributions:
+            order = np.argsort(-np.abs(row), kind="stable")
+            explanations.append({
+                "bias": float(bias),
+                "contributions": [
+                    {"feature": self.feature_cols[j], "contribution": float(row[j])} for j in order
+                ],
+            })
+        return explanations
+
+    def warm_up(self, n_rows=256, seed=0):
+        # Runs the batch and single-row paths once on random in-range rows, so the
+        # memory-mapped tree arrays are paged in before the service takes traffic
+        import numpy as np
+
+        low = np.array([self.columns[col]["min"] for col in self.feature_cols], dtype=np.float64)
+        high = np.array([self.columns[col]["max"] for col in self.feature_cols], dtype=np.float64)
+        X = np.random.default_rng(seed).uniform(low, high, size=(n_rows, len(low))).round().astype(np.float32)
+        self.predict_array(X)
+        self.evaluate([{}])
+
+    def evaluate(self, records, language="en"):
+        from grading import banding, round_scores
+
+        predictions = self.predict(records)
+        with timings.timed("predict.grade"):
+            scores = round_scores(predictions).tolist()
+            levels, statuses = banding.classify(scores, language)
+            return [
+                {"score": score, "level": level, "status": status}
+                for score, level, status in zip(scores, levels, statuses)
+            ]
+
+
+_service = None
+_service_lock = threading.Lock()
+_schema = None
+_schema_source = None
+_warm_up_thread = None
+_swap_thread = None
+_watch_thread = None
+_failed_source = None
+_checked_at = 0.0
+
+
+def model_source():
+    # What this process should serve: the registry's active version, or the
+    # model.pkl in the working directory (identified by its stamp) when no
+    # version has been registered
+    version = active_version()
+    if version is not None:
+        return ("version", version)
+    return ("file", model_stamp())
+
+
+def _source_paths(source):
+    if source[0] == "version":
+        return artifact_paths(version_dir(source[1]))
+    return {"model": MODEL_PATH, "flat": FLAT_MODEL_PATH, "schema": SCHEMA_PATH}
+
+
+def get_schema():
+    # Only the small JSON schema: enough to render the forms
+    global _schema, _schema_source
+    source = model_source()
+    with _service_lock:
+        if _schema is None or _schema_source != source:
+            _schema = load_schema(_source_paths(source)["schema"])
+            _schema_source = source
+        return _schema
+
+
+def get_service():
+    # One warm service per process. Only the very first call waits for a load;
+    # a newly activated model is loaded and warmed up in the background and
+    # swapped in afterwards, while callers keep getting the current service.
+    global _service
+    service = _service
+    if service is None:
+        with _service_lock:
+            if _service is None:
+                with timings.timed("model.load"):
+                    _service = PredictionService()
+            return _service
+    check_for_new_model()
+    return service
+
+
+def check_for_new_model(force=False):
+    # Cheap enough to call on every request: reads the active pointer at most
+    # once per CHECK_INTERVAL and starts a background swap when it has moved
+    global _checked_at, _swap_thread
+    now = time.monotonic()
+    if _service is None or (not force and now - _checked_at < CHECK_INTERVAL):
+        return
+    _checked_at = now
+    source = model_source()
+    if source == _service.source or source == _failed_source:
+        return
+    with _service_lock:
+        if _swap_thread is not None and _swap_thread.is_alive():
+            return
+        _swap_thread = threading.Thread(target=_swap_in, args=(source,), daemon=True)
+        _swap_thread.start()
+
+
+def _swap_in(source):
+    global _service, _failed_source
+    try:
+        with timings.timed("model.load"):
+            service = PredictionService(source)
+        with timings.timed("model.warm_up"):
+            service.warm_up()
+    except Exception:
+        # Keep serving the current model; this source is retried only after the pointer moves again
+        _failed_source = source
+        return
+    # One reference assignment: requests already holding the old service finish on
+    # it, and every later get_service() call returns the new one
+    _service = service
+
+
+def current_service():
+    # The loaded service, or None while the model has not been loaded yet
+    return _service
+
+
+def _warm_up():
+    try:
+        get_service()
+    except Exception:
+        # The first prediction retries the load and reports the error to the user
+        pass
+
+
+def warm_up_in_background():
+    # Load the model in a daemon thread so the first prediction does not wait for it
+    global _warm_up_thread
+    watch_for_new_models()
+    with _service_lock:
+        if _warm_up_thread is not None and (_warm_up_thread.is_alive() or _service is not None):
+            return
+        _warm_up_thread = threading.Thread(target=_warm_up, daemon=True)
+        _warm_up_thread.start()
+
+
+def _watch():
+    while True:
+        time.sleep(CHECK_INTERVAL)
+        check_for_new_model(force=True)
+
+
+def watch_for_new_models():
+    # Polls the active pointer in a daemon thread, so a new version is swapped in
+    # even while no requests arrive
+    global _watch_thread
+    with _service_lock:
+        if _watch_thread is None:
+            _watch_thread = threading.Thread(target=_watch, daemon=True)
+            _watch_thread.start()
@@ -0,0 +1,167 @@
+import argparse
+import errno
+import json
+import os
+import shutil
+import time
+
+from atomic_dir import replace_directory, temp_sibling
+from prediction_cache import FLAT_MODEL_PATH, MODEL_PATH, model_stamp
+from schema import SCHEMA_PATH
+
+REGISTRY_DIR = "models"
+ACTIVE_FILE = "ACTIVE"
+
+# Layout of one registered version:
+#   models/v0003/model.pkl       the fitted forest
+#   models/v0003/model_flat/     flat arrays the app serves from
+#   models/v0003/schema.json     feature schema the forms are built from
+#   models/v0003/meta.json       data hash, metrics, training parameters
+#   models/ACTIVE                "3": the version servers should load
+
+
+def version_dir(version, registry=REGISTRY_DIR):
+    return os.path.join(registry, f"v{version:04d}")
+
+
+def artifact_paths(path):
+    # Where PredictionService finds a version's files
+    return {
+        "model": os.path.join(path, "model.pkl"),
+        "flat": os.path.join(path, "model_flat"),
+        "schema": os.path.join(path, "schema.json"),
+    }
+
+
+def register_model(model, forest, schema, meta, registry=REGISTRY_DIR, activate=True):
+    # Writes a freshly trained model straight into the next free version directory
+    # and returns (version, path). The version is built under a temporary name and
+    # renamed into place, so a reader never sees it half-written; if another run
+    # claimed the number in the meantime, the next one is tried.
+    import joblib
+
+    from flat_forest import save_flat_forest
+    from schema import save_schema
+
+    os.makedirs(registry, exist_ok=True)
+    tmp = temp_sibling(os.path.join(registry, "new"))
+    paths = artifact_paths(tmp)
+    joblib.dump(model, paths["model"])
+    save_flat_forest(forest, paths["flat"], model_stamp(paths["model"]))
+    save_schema(schema, paths["schema"])
+
+    version = max(list_versions(registry), default=0) + 1
+    while True:
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": version, "created": time.time(), **meta}, f, indent=2)
+        final = version_dir(version, registry)
+        try:
+            os.rename(tmp, final)
+            break
+        except OSError as e:
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+            version += 1
+
+    if activate:
+        set_active(version, registry)
+    return version, final
+
+
+def copy_to_root(version, registry=REGISTRY_DIR, model_path=MODEL_PATH, flat_path=FLAT_MODEL_PATH,
+                 schema_path=SCHEMA_PATH):
+    # Publishes a registered version as the project-root artifacts the offline tools
+    # read. copy2 keeps modification times, so model_stamp() of the root model equals
+    # the registered copy's (lookup tables built for one stay valid for the other).
+    # Each file is replaced with a rename, never rewritten in place.
+    paths = artifact_paths(version_dir(version, registry))
+    for src, dst in [(paths["model"], model_path), (paths["schema"], schema_path)]:
+        tmp_path = f"{dst}.tmp-{os.getpid()}"
+        shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dst)
+    tmp = temp_sibling(flat_path)
+    shutil.copytree(paths["flat"], tmp, dirs_exist_ok=True)
+    replace_directory(tmp, flat_path)
+
+
+def activate(version, registry=REGISTRY_DIR):
+    # Serve a registered version (also how a rollback is done): running servers
+    # follow the pointer, and the root copies follow it too, so the offline tools
+    # and cohort statistics describe the model that is actually being served
+    set_active(version, registry)
+    copy_to_root(version, registry)
+
+
+def list_versions(registry=REGISTRY_DIR):
+    versions = []
+    try:
+        names = os.listdir(registry)
+    except OSError:
+        return versions
+    for name in names:
+        if name.startswith("v") and name[1:].isdigit():
+            versions.append(int(name[1:]))
+    return sorted(versions)
+
+
+def load_meta(version, registry=REGISTRY_DIR):
+    with open(os.path.join(version_dir(version, registry), "meta.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def set_active(version, registry=REGISTRY_DIR):
+    # Write-then-rename, so servers read either the old or the new pointer
+    if not os.path.exists(os.path.join(version_dir(version, registry), "meta.json")):
+        raise ValueError(f"Version {version} is not registered")
+    path = os.path.join(registry, ACTIVE_FILE)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(f"{version}\n")
+    os.replace(tmp_path, path)
+
+
+def active_version(registry=REGISTRY_DIR):
+    # The version servers should load, or None when nothing is registered yet
+    try:
+        with open(os.path.join(registry, ACTIVE_FILE), encoding="utf-8") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List, inspect and activate registered model versions.")
+    parser.add_argument("--registry", default=REGISTRY_DIR, help=f"Registry directory (default: {REGISTRY_DIR})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Show every version with its metrics")
+    show = sub.add_parser("show", help="Print one version's metadata")
+    show.add_argument("version", type=int)
+    activate = sub.add_parser("activate", help="Point running servers at a version (also used to roll back)")
+    activate.add_argument("version", type=int)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        active = active_version(args.registry)
+        versions = list_versions(args.registry)
+        if not versions:
+            print(f"No versions registered in {args.registry}/")
+        for version in versions:
+            meta = load_meta(version, args.registry)
+            metrics = ", ".join(f"{k} {v:.4f}" for k, v in meta.get("metrics", {}).items() if v is not None)
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(meta.get("created", 0)))
+            marker = "*" if version == active else " "
+            print(f"{marker} v{version:04d}  {created}  {meta.get('n_rows', 0):>9,} rows  "
+                  f"{meta.get('n_estimators', 0):>4} trees  {metrics}")
+    elif args.command == "show":
+        print(json.dumps(load_meta(args.version, args.registry), indent=2))
+    else:
+        try:
+            activate(args.version, args.registry)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Active version: v{args.version:04d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import json
+import os
+
+DATASET_PATH = "merged_dataset.csv"
+SCHEMA_PATH = "schema.json"
+TARGET_COL = "ExamScore"
+DROP_COLS = [TARGET_COL, "FinalGrade"]
+
+# Columns with at most this many distinct values keep their full domain
+# so the forms can build selectboxes without scanning the dataset
+MAX_DOMAIN_SIZE = 100
+
+
+def build_schema(df):
+    feature_cols = df.drop(DROP_COLS, axis=1).columns.tolist()
+    columns = {}
+    for col in feature_cols:
+        series = df[col]
+        info = {
+            "dtype": str(series.dtype),
+            "min": series.min().item(),
+            "max": series.max().item(),
+            "mean": float(series.mean()),
+        }
+        unique = series.unique()
+        if len(unique) <= MAX_DOMAIN_SIZE:
+            info["values"] = sorted(v.item() for v in unique)
+        columns[col] = info
+
+    return {
+        "target": TARGET_COL,
+        "feature_cols": feature_cols,
+        "n_rows": int(len(df)),
+        "columns": columns,
+    }
+
+
+def save_schema(schema, path=SCHEMA_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=2)
+
+
+def load_schema(path=SCHEMA_PATH, dataset_path=DATASET_PATH):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    # No schema next to the model yet (e.g. an old training run), so build it
+    # once from the dataset and try to persist it for the next process
+    from dataset import load_dataset
+
+    schema = build_schema(load_dataset(dataset_path))
+    try:
+        save_schema(schema, path)
+    except OSError:
+        pass
+    return schema
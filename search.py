@@ -0,0 +1,150 @@
+import io
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import KFold, ParameterGrid, cross_validate
+
+from flat_forest import export_forest
+from incremental import dataset_fingerprint
+
+TRIALS_PATH = "search_trials.jsonl"
+
+PARAM_GRID = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [None, 20, 12],
+    "min_samples_leaf": [1, 2, 5],
+    "max_features": [1.0, 0.5, "sqrt"],
+}
+
+
+def search_setup(X, y, cv, random_state):
+    # Everything besides the hyperparameters that a trial's scores depend on
+    data = X.assign(**{y.name: y})
+    return {"cv": cv, "random_state": random_state, "data_hash": dataset_fingerprint(data, len(data))}
+
+
+def trial_key(params, setup):
+    # Trials from another dataset, fold count or seed never match, so a resumed
+    # search only reuses scores computed on the current data
+    return json.dumps({"params": params, "setup": setup}, sort_keys=True)
+
+
+def load_trials(path=TRIALS_PATH):
+    trials = {}
+    if not os.path.exists(path):
+        return trials
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                trial = json.loads(line)
+            except ValueError:
+                # Partially written last line from an interrupted run
+                continue
+            trials[trial_key(trial["params"], trial.get("setup"))] = trial
+    return trials
+
+
+def save_trial(trial, path=TRIALS_PATH):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(trial) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def serving_cost(model, X, repeat=200):
+    # Size of the pickled forest and single-row latency of the flat evaluator used by the app
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+
+    forest = export_forest(model)
+    row = X[:1]
+    forest.predict(row)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        forest.predict(row)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "size_mb": buffer.tell() / 1e6,
+        "nodes": int(len(forest.value)),
+        "latency_ms": float(np.median(timings) * 1e3),
+    }
+
+
+def run_trial(params, X, y, cv, random_state, setup):
+    start = time.perf_counter()
+    # Trees are built in parallel across all cores; folds run one after another
+    model = RandomForestRegressor(**params, random_state=random_state, n_jobs=-1)
+    scores = cross_validate(model, X, y, cv=KFold(cv, shuffle=True, random_state=random_state),
+                            scoring="r2", return_estimator=True)
+    fitted = scores["estimator"][0]
+    fitted.set_params(n_jobs=None)
+
+    return {
+        "params": params,
+        "setup": setup,
+        "cv_r2": float(np.mean(scores["test_score"])),
+        "cv_r2_std": float(np.std(scores["test_score"])),
+        **serving_cost(fitted, np.asarray(X, dtype=np.float32)),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _dominates(a, b):
+    no_worse = a["cv_r2"] >= b["cv_r2"] and a["latency_ms"] <= b["latency_ms"] and a["size_mb"] <= b["size_mb"]
+    better = a["cv_r2"] > b["cv_r2"] or a["latency_ms"] < b["latency_ms"] or a["size_mb"] < b["size_mb"]
+    return no_worse and better
+
+
+def pareto_frontier(trials):
+    # Trials that no other trial beats on R², latency and size at once
+    frontier = [t for t in trials if not any(_dominates(other, t) for other in trials)]
+    return sorted(frontier, key=lambda t: -t["cv_r2"])
+
+
+def select_trial(trials, r2_tolerance=0.005, max_latency_ms=None, max_size_mb=None):
+    # Cheapest model to serve whose R² is within tolerance of the best affordable one
+    feasible = [
+        t for t in trials
+        if (max_latency_ms is None or t["latency_ms"] <= max_latency_ms)
+        and (max_size_mb is None or t["size_mb"] <= max_size_mb)
+    ]
+    if not feasible:
+        raise ValueError("No trial satisfies the latency/size limits")
+    best_r2 = max(t["cv_r2"] for t in feasible)
+    candidates = [t for t in feasible if t["cv_r2"] >= best_r2 - r2_tolerance]
+    return min(candidates, key=lambda t: (t["latency_ms"], t["size_mb"]))
+
+
+def print_trials(trials, title):
+    print(f"\n{title}")
+    print(f"{'R² (cv)':>9} {'±':>6} {'Latency ms':>11} {'Size MB':>9}  Params")
+    for t in trials:
+        params = ", ".join(f"{k}={v}" for k, v in sorted(t["params"].items()))
+        print(f"{t['cv_r2']:>9.4f} {t['cv_r2_std']:>6.4f} {t['latency_ms']:>11.3f} {t['size_mb']:>9.2f}  {params}")
+
+
+def run_search(X, y, grid=PARAM_GRID, cv=5, trials_path=TRIALS_PATH, random_state=42, **selection):
+    done = load_trials(trials_path)
+    setup = search_setup(X, y, cv, random_state)
+    candidates = list(ParameterGrid(grid))
+    todo = [params for params in candidates if trial_key(params, setup) not in done]
+    print(f"Search: {len(candidates)} trials, {len(candidates) - len(todo)} already done in {trials_path}")
+
+    for i, params in enumerate(todo, 1):
+        trial = run_trial(params, X, y, cv, random_state, setup)
+        save_trial(trial, trials_path)
+        done[trial_key(params, setup)] = trial
+        print(f"[{i}/{len(todo)}] R² {trial['cv_r2']:.4f}, {trial['latency_ms']:.3f} ms, "
+              f"{trial['size_mb']:.1f} MB ({trial['seconds']:.0f}s) {params}")
+
+    trials = [done[trial_key(params, setup)] for params in candidates]
+    print_trials(pareto_frontier(trials), "Accuracy vs serving cost frontier:")
+    selected = select_trial(trials, **selection)
+    print_trials([selected], "Selected:")
+    return selected["params"]
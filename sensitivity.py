@@ -0,0 +1,72 @@
+import numpy as np
+
+from grading import round_scores
+from instrumentation import timings
+
+# Pairs swept as a full grid, on top of the single-feature curves
+DEFAULT_PAIRS = [("StudyHours", "Attendance")]
+
+# Cap on points per feature when a column has no stored domain
+MAX_POINTS = 101
+
+
+def feature_values(info):
+    # Every valid value when the schema stores the domain, else an even grid over the range
+    if "values" in info:
+        return np.array(info["values"], dtype=np.float32)
+    if info["dtype"].startswith("int") and info["max"] - info["min"] < MAX_POINTS:
+        return np.arange(info["min"], info["max"] + 1, dtype=np.float32)
+    return np.linspace(info["min"], info["max"], MAX_POINTS, dtype=np.float32)
+
+
+def sweep(service, record, pairs=DEFAULT_PAIRS):
+    # Vary one feature (or one pair) at a time around the submitted profile and
+    # score the whole grid with a single batched model call
+    base = service.assemble_row(record)
+    values = {col: feature_values(service.columns[col]) for col in service.feature_cols}
+
+    blocks = [base[None, :]]
+    for col in service.feature_cols:
+        block = np.tile(base, (len(values[col]), 1))
+        block[:, service.index[col]] = values[col]
+        blocks.append(block)
+    for a, b in pairs:
+        block = np.tile(base, (len(values[a]) * len(values[b]), 1))
+        block[:, service.index[a]] = np.repeat(values[a], len(values[b]))
+        block[:, service.index[b]] = np.tile(values[b], len(values[a]))
+        blocks.append(block)
+
+    with timings.timed("predict.sweep"):
+        scores = round_scores(service.model.predict(np.concatenate(blocks)))
+
+    sizes = [len(block) for block in blocks]
+    parts = np.split(scores, np.cumsum(sizes)[:-1])
+    result = {"base": float(parts[0][0]), "curves": {}, "pairs": []}
+    for col, part in zip(service.feature_cols, parts[1:]):
+        result["curves"][col] = {
+            "values": values[col].tolist(),
+            "scores": part.tolist(),
+            "current": float(base[service.index[col]]),
+        }
+    for (a, b), part in zip(pairs, parts[1 + len(service.feature_cols):]):
+        result["pairs"].append({
+            "features": [a, b],
+            "x": values[a].tolist(),
+            "y": values[b].tolist(),
+            "scores": part.reshape(len(values[a]), len(values[b])).tolist(),
+        })
+    return result
+
+
+def best_changes(result):
+    # Largest score gain each feature can bring on its own, biggest first
+    changes = []
+    for col, curve in result["curves"].items():
+        best = int(np.argmax(curve["scores"]))
+        changes.append({
+            "feature": col,
+            "current": curve["current"],
+            "best_value": curve["values"][best],
+            "gain": round(curve["scores"][best] - result["base"], 2),
+        })
+    return sorted(changes, key=lambda change: -change["gain"])
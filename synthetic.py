@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from dataset import CHUNKSIZE, DATASET_PATH, load_dataset
+from schema import TARGET_COL
+
+REPORT_COLS = ["StudyHours", "Attendance", "AssignmentCompletion", "OnlineCourses", "StressLevel"]
+
+
+class SyntheticGenerator:
+    # Gaussian copula over the empirical marginals: each column keeps its exact
+    # value frequencies, and the columns are tied together by the correlation of
+    # their normal scores. Columns that are a function of another column (such
+    # as FinalGrade of ExamScore) are rebuilt from that column instead.
+
+    def __init__(self, columns, dtypes, values, cdfs, correlation, derived):
+        self.columns = list(columns)
+        self.dtypes = dtypes
+        self.values = values
+        self.cdfs = cdfs
+        self.correlation = np.asarray(correlation)
+        self.derived = derived
+        self.copula_cols = [col for col in self.columns if col not in derived]
+        self._cholesky = np.linalg.cholesky(self.correlation)
+
+    @classmethod
+    def fit(cls, df):
+        derived = _functional_dependencies(df)
+        copula_cols = [col for col in df.columns if col not in derived]
+
+        values, cdfs, scores = {}, {}, []
+        for col in copula_cols:
+            counts = df[col].value_counts().sort_index()
+            cdf = np.cumsum(counts.to_numpy()) / len(df)
+            values[col] = counts.index.to_numpy()
+            cdfs[col] = cdf
+
+            # Normal score of each value: the midpoint of its probability band
+            midpoints = cdf - counts.to_numpy() / len(df) / 2
+            scores.append(ndtri(midpoints)[np.searchsorted(values[col], df[col].to_numpy())])
+
+        correlation = np.corrcoef(np.stack(scores)) if len(scores) > 1 else np.ones((1, 1))
+        return cls(df.columns, {col: df[col].dtype for col in df.columns}, values, cdfs,
+                   _nearest_correlation(correlation), derived)
+
+    def sample(self, n, rng):
+        z = rng.standard_normal((n, len(self.copula_cols))) @ self._cholesky.T
+        u = ndtr(z)
+
+        data = {}
+        for i, col in enumerate(self.copula_cols):
+            index = np.minimum(np.searchsorted(self.cdfs[col], u[:, i], side="right"), len(self.values[col]) - 1)
+            data[col] = self.values[col][index]
+        for col, (parent, parent_values, child_values) in self.derived.items():
+            data[col] = child_values[np.searchsorted(parent_values, data[parent])]
+        return pd.DataFrame({col: data[col].astype(self.dtypes[col]) for col in self.columns})
+
+    def chunks(self, n_rows, chunksize=CHUNKSIZE, seed=42):
+        # Each chunk has its own seeded stream, so output depends only on seed and chunksize
+        for i, start in enumerate(range(0, n_rows, chunksize)):
+            rng = np.random.default_rng([seed, i])
+            yield self.sample(min(chunksize, n_rows - start), rng)
+
+
+def _functional_dependencies(df):
+    # child -> (parent, parent values, child value for each parent value)
+    derived = {}
+    nunique = df.nunique()
+    for child in df.columns:
+        for parent in df.columns:
+            if parent == child or parent in derived or nunique[parent] <= nunique[child]:
+                continue
+            mapping = df.groupby(parent)[child].agg(["nunique", "first"])
+            if (mapping["nunique"] == 1).all():
+                derived[child] = (parent, mapping.index.to_numpy(), mapping["first"].to_numpy())
+                break
+    return derived
+
+
+def _nearest_correlation(matrix):
+    # Clip negative eigenvalues left by rounding so the Cholesky factor exists
+    eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+    fixed = eigenvectors @ np.diag(np.maximum(eigenvalues, 1e-10)) @ eigenvectors.T
+    scale = np.sqrt(np.diag(fixed))
+    return fixed / np.outer(scale, scale)
+
+
+def write_csv(generator, path, n_rows, chunksize=CHUNKSIZE, seed=42):
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        for i, chunk in enumerate(generator.chunks(n_rows, chunksize, seed)):
+            chunk.to_csv(out, header=(i == 0), index=False)
+            yield len(chunk)
+
+
+def write_columns(generator, path, n_rows, chunksize=CHUNKSIZE, seed=42):
+    # Same layout as dataset.convert_dataset, so load_dataset(binary_path=path) reads it
+    os.makedirs(path, exist_ok=True)
+    outputs = {
+        col: np.lib.format.open_memmap(os.path.join(path, f"{col}.npy"), mode="w+",
+                                       dtype=generator.dtypes[col], shape=(n_rows,))
+        for col in generator.columns
+    }
+    start = 0
+    for chunk in generator.chunks(n_rows, chunksize, seed):
+        stop = start + len(chunk)
+        for col, output in outputs.items():
+            output[start:stop] = chunk[col].to_numpy()
+        start = stop
+        yield len(chunk)
+    for output in outputs.values():
+        output.flush()
+
+    meta = {
+        "columns": generator.columns,
+        "dtypes": {col: np.dtype(dtype).name for col, dtype in generator.dtypes.items()},
+        "n_rows": n_rows,
+        "source": None,
+    }
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def print_report(real, synthetic):
+    print(f"\n{'Column':<22} {'Mean real':>10} {'Mean synth':>11} {'Corr real':>10} {'Corr synth':>11}   (corr with {TARGET_COL})")
+    real_corr = real.corr(method="spearman")[TARGET_COL]
+    synth_corr = synthetic.corr(method="spearman")[TARGET_COL]
+    for col in REPORT_COLS + [TARGET_COL]:
+        print(f"{col:<22} {real[col].mean():>10.2f} {synthetic[col].mean():>11.2f} "
+              f"{real_corr[col]:>10.3f} {synth_corr[col]:>11.3f}")
+    gap = (real.corr(method="spearman") - synthetic.corr(method="spearman")).abs().to_numpy().max()
+    print(f"Largest rank-correlation difference over all column pairs: {gap:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream synthetic student records that follow the dataset's distributions.")
+    parser.add_argument("output", help="Output CSV file, or directory with --format columns")
+    parser.add_argument("--rows", type=int, required=True, help="Number of rows to generate")
+    parser.add_argument("--format", choices=["csv", "columns"], default="csv",
+                        help="CSV, or the typed binary layout read by dataset.py (default: csv)")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE, help=f"Rows per chunk (default: {CHUNKSIZE:,})")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--source", default=DATASET_PATH, help=f"Dataset to learn from (default: {DATASET_PATH})")
+    parser.add_argument("--report", action="store_true", help="Compare the first chunk with the source dataset")
+    args = parser.parse_args()
+
+    # Only the default dataset has a binary copy; converting another CSV would overwrite it
+    real = load_dataset() if args.source == DATASET_PATH else pd.read_csv(args.source)
+    generator = SyntheticGenerator.fit(real)
+    for child, (parent, _, _) in generator.derived.items():
+        print(f"{child} is derived from {parent}")
+
+    writer = write_csv if args.format == "csv" else write_columns
+    written = 0
+    start = time.perf_counter()
+    for n in writer(generator, args.output, args.rows, args.chunksize, args.seed):
+        written += n
+        elapsed = time.perf_counter() - start
+        print(f"{written:,}/{args.rows:,} rows ({written / elapsed:,.0f} rows/sec)")
+
+    if args.report:
+        print_report(real, next(generator.chunks(min(args.rows, args.chunksize), args.chunksize, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
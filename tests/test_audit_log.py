@@ -0,0 +1,58 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audit_log  # noqa: E402
+
+
+class FakeService:
+    feature_cols = ["a", "b"]
+    version = 1
+
+    def assemble_row(self, record):
+        return np.array([record["a"], record["b"]], dtype=np.float32)
+
+
+class LogPredictionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.saved = audit_log.AuditLog, audit_log._audit_log, audit_log._audit_disabled, audit_log.unlogged
+        audit_log._audit_log, audit_log._audit_disabled, audit_log.unlogged = None, False, 0
+
+    def tearDown(self):
+        if audit_log._audit_log is not None:
+            audit_log._audit_log.close()
+        audit_log.AuditLog, audit_log._audit_log, audit_log._audit_disabled, audit_log.unlogged = self.saved
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_unwritable_directory_is_reported_once(self):
+        # A file where the directory should be: os.makedirs fails
+        blocker = os.path.join(self.tmp, "blocker")
+        open(blocker, "w").close()
+        original = self.saved[0]
+        audit_log.AuditLog = lambda: original(os.path.join(blocker, "audit"))
+        for _ in range(3):
+            audit_log.log_prediction(FakeService(), {"a": 1, "b": 2}, {"score": 70.0})
+        self.assertTrue(audit_log._audit_disabled)
+        self.assertEqual(audit_log.unlogged, 3)
+
+    def test_bad_record_does_not_raise(self):
+        path = os.path.join(self.tmp, "audit")
+        original = self.saved[0]
+        audit_log.AuditLog = lambda: original(path, fsync=False)
+        audit_log.log_prediction(FakeService(), {"a": 1}, {"score": 70.0})
+        audit_log.log_prediction(FakeService(), {"a": 1, "b": 2}, {"score": 70.0})
+        audit_log._audit_log.close()
+        self.assertEqual(audit_log.unlogged, 1)
+        self.assertEqual(len(audit_log.read_audit_log(path)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compact import build_forest, prune_tree  # noqa: E402
+
+
+class PruneTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = pd.DataFrame(rng.integers(0, 10, (500, 3)).astype(float), columns=["a", "b", "c"])
+        y = self.X["a"] * 3 + rng.normal(size=len(self.X))
+        self.model = RandomForestRegressor(n_estimators=4, random_state=0).fit(self.X, y)
+
+    def compact(self, **prune):
+        trees = [prune_tree(e.tree_, **prune) for e in self.model.estimators_]
+        return build_forest(trees, self.model.feature_names_in_, np.float64)
+
+    def test_unpruned_matches_sklearn(self):
+        forest = self.compact()
+        np.testing.assert_allclose(forest.predict(self.X.to_numpy()), self.model.predict(self.X))
+
+    def test_fully_pruned_trees_predict_root_means(self):
+        root_mean = np.mean([e.tree_.value[0, 0, 0] for e in self.model.estimators_])
+        for prune in [{"max_depth": 0}, {"min_samples": len(self.X) + 1}]:
+            forest = self.compact(**prune)
+            self.assertTrue((forest.feature[forest.roots] < 0).all())
+            np.testing.assert_allclose(forest.predict(self.X.to_numpy()[:20]), root_mean)
+
+
+if __name__ == "__main__":
+    unittest.main()
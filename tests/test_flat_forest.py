@@ -0,0 +1,79 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flat_forest import export_forest, load_flat_forest  # noqa: E402
+
+
+def forest_with_leaf_roots():
+    # Warm-start trees fitted on a single row are single-node trees (root is a leaf)
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.integers(0, 10, (500, 3)).astype(float), columns=["a", "b", "c"])
+    y = X["a"] * 3 + rng.normal(size=len(X))
+    model = RandomForestRegressor(n_estimators=3, random_state=0).fit(X, y)
+    model.set_params(warm_start=True, n_estimators=5)
+    model.fit(X.iloc[:1], y.iloc[:1])
+    return model, X
+
+
+class LeafRootTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model, self.X = forest_with_leaf_roots()
+        self.forest = export_forest(self.model)
+
+    def test_forest_has_single_node_trees(self):
+        self.assertEqual(int((self.forest.feature[self.forest.roots] < 0).sum()), 2)
+
+    def test_predict_matches_sklearn(self):
+        np.testing.assert_array_equal(self.forest.predict(self.X.to_numpy()), self.model.predict(self.X))
+
+    def test_leaves_of_single_node_tree_are_its_root(self):
+        leaves = self.forest.leaves(self.X.to_numpy()[:10])
+        for tree, root in enumerate(self.forest.roots):
+            if self.forest.feature[root] < 0:
+                self.assertTrue((leaves[tree] == root).all())
+
+    def test_contributions_add_up_to_prediction(self):
+        X = self.X.to_numpy()[:50]
+        bias, contributions = self.forest.contributions(X)
+        np.testing.assert_allclose(bias + contributions.sum(axis=1), self.forest.predict(X), atol=1e-9)
+
+
+class StaleExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.tmp, "model.pkl")
+        self.flat_path = os.path.join(self.tmp, "model_flat")
+        self.model, self.X = forest_with_leaf_roots()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_replaced_model_is_exported_again(self):
+        joblib.dump(self.model, self.model_path)
+        self.assertEqual(load_flat_forest(self.flat_path, self.model_path).n_trees, 5)
+        self.assertEqual(load_flat_forest(self.flat_path, self.model_path).n_trees, 5)
+
+        # model.pkl swapped in by hand, model_flat/ left from the old one
+        time.sleep(0.01)
+        smaller = RandomForestRegressor(n_estimators=2, random_state=1).fit(self.X, self.X["a"])
+        joblib.dump(smaller, self.model_path)
+        forest = load_flat_forest(self.flat_path, self.model_path)
+        self.assertEqual(forest.n_trees, 2)
+        np.testing.assert_array_equal(forest.predict(self.X.to_numpy()), smaller.predict(self.X))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grading import banding, round_scores  # noqa: E402
+from lookup_table import rounded_centipoints  # noqa: E402
+
+
+class RoundScoresTest(unittest.TestCase):
+
+    def test_matches_python_round(self):
+        rng = np.random.default_rng(0)
+        scores = np.concatenate([rng.uniform(0, 100, 100_000), np.arange(0, 100, 0.005)])
+        np.testing.assert_array_equal(round_scores(scores), [round(float(score), 2) for score in scores])
+
+    def test_pass_mark_gets_one_label(self):
+        # ndarray.round(2) turns 59.995 into 60.0 (Pass); round() gives 59.99 (Fail)
+        score = round_scores([59.995])
+        self.assertEqual(score[0], round(59.995, 2))
+        self.assertEqual(banding.classify(score)[1][0], "Fail")
+        self.assertEqual(rounded_centipoints(np.array([59.995]))[0], 5999)
+
+    def test_missing_scores_stay_missing(self):
+        self.assertTrue(np.isnan(round_scores([np.nan, 70.0])[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
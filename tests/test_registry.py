@@ -0,0 +1,117 @@
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import prediction_service  # noqa: E402
+from prediction_cache import model_stamp  # noqa: E402
+from registry import activate, active_version, list_versions, load_meta  # noqa: E402
+from train import incremental_base, save_artifacts, train_full, train_incremental  # noqa: E402
+
+
+def make_dataset(n_rows, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "StudyHours": rng.integers(0, 40, n_rows),
+        "Attendance": rng.integers(50, 100, n_rows),
+        "Age": rng.integers(18, 30, n_rows),
+    })
+    df["ExamScore"] = 40 + df["StudyHours"] + df["Attendance"] * 0.2 + rng.normal(size=n_rows)
+    df["FinalGrade"] = (df["ExamScore"] > 60).astype(int)
+    return df
+
+
+class RegistryTest(unittest.TestCase):
+    # Runs train.py's steps in a scratch working directory: the registry and root
+    # artifacts are relative paths
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+        self.args = argparse.Namespace(search=False, new_trees=20, retire_trees=0)
+        self.df = make_dataset(300, 0)
+
+    def tearDown(self):
+        prediction_service._service = None
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def train(self, df, incremental=False):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self._train(df, incremental)
+
+    def _train(self, df, incremental):
+        if incremental:
+            model_path, state = incremental_base()
+            model, metrics = train_incremental(self.args, df, model_path, state)
+        else:
+            model, metrics = train_full(self.args, df)
+        save_artifacts(model, df, metrics)
+        return model
+
+    def test_register_activates_and_publishes_to_root(self):
+        self.train(self.df)
+        self.assertEqual(list_versions(), [1])
+        self.assertEqual(active_version(), 1)
+        self.assertEqual(load_meta(1)["n_rows"], len(self.df))
+        self.assertEqual(model_stamp("model.pkl"), model_stamp("models/v0001/model.pkl"))
+
+    def test_incremental_grows_the_rolled_back_version(self):
+        self.train(self.df)
+        grown = pd.concat([self.df, make_dataset(100, 1)], ignore_index=True)
+        self.train(grown, incremental=True)
+        self.assertEqual(load_meta(2)["n_estimators"], 120)
+
+        # Roll back: servers and the root copy follow the pointer
+        activate(1)
+        self.assertEqual(active_version(), 1)
+        self.assertEqual(len(joblib.load("model.pkl").estimators_), 100)
+        self.assertEqual(model_stamp("model.pkl"), model_stamp("models/v0001/model.pkl"))
+
+        # The next run grows v1 on every row v1 has not seen, not the rolled-back v2
+        grown = pd.concat([grown, make_dataset(100, 2)], ignore_index=True)
+        self.train(grown, incremental=True)
+        self.assertEqual(active_version(), 3)
+        self.assertEqual(load_meta(3)["n_estimators"], 120)
+        self.assertEqual(load_meta(3)["n_rows"], len(grown))
+
+    def test_running_service_swaps_to_the_active_version(self):
+        self.train(self.df)
+        self.train(pd.concat([self.df, make_dataset(100, 1)], ignore_index=True), incremental=True)
+        prediction_service._service = prediction_service.PredictionService()
+        self.assertEqual(prediction_service.current_service().version, 2)
+
+        activate(1)
+        prediction_service.check_for_new_model(force=True)
+        prediction_service._swap_thread.join()
+        service = prediction_service.current_service()
+        self.assertEqual(service.version, 1)
+        self.assertEqual(service.model.n_trees, 100)
+
+    def test_large_batches_match_the_flat_forest(self):
+        self.train(self.df)
+        service = prediction_service.PredictionService()
+        X = self.df[service.feature_cols].to_numpy(np.float32)
+        X = np.tile(X, (prediction_service.SKLEARN_BATCH_ROWS // len(X) + 1, 1))
+        flat = service.model.predict(X)
+
+        # Scored by the flat forest while model.pkl loads, by sklearn afterwards
+        np.testing.assert_array_equal(service.predict_array(X), flat)
+        service._batch_model_thread.join()
+        self.assertIsNotNone(service.batch_model)
+        np.testing.assert_array_equal(service.predict_array(X), flat)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,31 +1,162 @@
-import pandas as pd
+import argparse
+import json
+import math
+
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import r2_score
 import joblib
 
-# Load dataset
-df = pd.read_csv("merged_dataset.csv")
+from dataset import load_dataset
+from flat_forest import export_forest
+from incremental import MIN_NEW_RECORDS, dataset_fingerprint, grow_forest, load_state, new_records
+from prediction_cache import MODEL_PATH
+from registry import active_version, artifact_paths, copy_to_root, load_meta, register_model, version_dir
+from schema import build_schema
+from search import PARAM_GRID, TRIALS_PATH, run_search
 
 # Select target - using ExamScore as the primary performance indicator
 target = "ExamScore"
-X = df.drop([target, "FinalGrade"], axis=1)  # Drop target and FinalGrade
-y = df[target]
 
-# Train-test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# Train model
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
+def split_features(df):
+    X = df.drop([target, "FinalGrade"], axis=1)  # Drop target and FinalGrade
+    y = df[target]
+    return X, y
+
+
+def save_artifacts(model, df, metrics):
+    # Register first: the version number is only known once the registry has
+    # accepted it, and a failed registration leaves the current root files untouched
+    fingerprint = dataset_fingerprint(df, len(df))
+    params = {k: v for k, v in model.get_params().items() if v is None or isinstance(v, (bool, int, float, str))}
+    version, versioned_path = register_model(model, export_forest(model), build_schema(df), {
+        "data_hash": fingerprint,
+        "n_rows": len(df),
+        "n_estimators": len(model.estimators_),
+        "params": params,
+        "metrics": metrics,
+    })
+
+    # Root copies (model.pkl, flat arrays, feature schema) for the offline tools.
+    # The next incremental run reads its watermark from meta.json: every row seen.
+    copy_to_root(version)
+
+    # Running apps and servers swap to the active version without a restart
+    print(f"\nModel saved successfully! (version {version}, {versioned_path}, now active)")
+
+
+def train_full(args, df):
+    X, y = split_features(df)
+
+    # Train-test split
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # Pick hyperparameters (search is resumable: finished trials are read back from --trials)
+    params = {"n_estimators": 100}
+    if args.search:
+        grid = PARAM_GRID
+        if args.grid:
+            with open(args.grid, encoding="utf-8") as f:
+                grid = json.load(f)
+        params = run_search(X_train, y_train, grid=grid, cv=args.cv, trials_path=args.trials,
+                            r2_tolerance=args.r2_tolerance, max_latency_ms=args.max_latency_ms,
+                            max_size_mb=args.max_size_mb)
+
+    # Train model on all cores, then predict single-threaded so tree sums keep a fixed order
+    model = RandomForestRegressor(**params, random_state=42, n_jobs=-1)
+    model.fit(X_train, y_train)
+    model.set_params(n_jobs=None)
+
+    # Evaluate model
+    train_score = model.score(X_train, y_train)
+    test_score = model.score(X_test, y_test)
+
+    print(f"Training R² Score: {train_score:.4f}")
+    print(f"Testing R² Score: {test_score:.4f}")
+    return model, {"train_r2": train_score, "test_r2": test_score}
+
+
+def incremental_base():
+    # (model path, state) for the model an incremental run grows: the active version,
+    # so a rollback is respected, trained on meta["n_rows"] rows with that data hash.
+    # training_state.json and the root model.pkl only for models from before the registry.
+    version = active_version()
+    if version is None:
+        return MODEL_PATH, load_state()
+    meta = load_meta(version)
+    state = {"version": version, "watermark": meta["n_rows"], "fingerprint": meta["data_hash"]}
+    return artifact_paths(version_dir(version))["model"], state
+
+
+def train_incremental(args, df, model_path, state):
+    new_df = new_records(df, state)
+    if new_df.empty:
+        print(f"No new records since the last training run (watermark: {state['watermark']:,} rows)")
+        return None, None
+    # Trees are fitted on 80% of the new records, the rest is held out
+    min_records = math.ceil(MIN_NEW_RECORDS / 0.8)
+    if len(new_df) < min_records:
+        print(f"Only {len(new_df)} new records since the last training run; "
+              f"waiting for at least {min_records} before growing trees")
+        return None, None
+
+    model = joblib.load(model_path)
+    if args.retire_trees >= len(model.estimators_) + args.new_trees:
+        raise ValueError("--retire-trees must leave at least one tree in the forest")
+
+    # Hold out part of the new records to compare the old and updated forests on them
+    X_new, y_new = split_features(new_df)
+    X_fit, X_check, y_fit, y_check = train_test_split(X_new, y_new, test_size=0.2, random_state=42)
+    before = r2_score(y_check, model.predict(X_check))
+
+    base = f"v{state['version']:04d}" if "version" in state else model_path
+    print(f"Growing {args.new_trees} trees of {base} on {len(X_fit):,} new records "
+          f"(rows {state['watermark']:,}-{len(df) - 1:,}), retiring {args.retire_trees} oldest")
+    grow_forest(model, X_fit, y_fit, args.new_trees, args.retire_trees)
+
+    after = r2_score(y_check, model.predict(X_check))
+    print(f"R² on held-out new records: {before:.4f} before, {after:.4f} after")
+    print(f"Forest now has {len(model.estimators_)} trees")
+    return model, {"new_records_r2_before": before, "new_records_r2_after": after}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the exam score model.")
+    parser.add_argument("--search", action="store_true",
+                        help="Cross-validated hyperparameter search before training the final model")
+    parser.add_argument("--grid", help="JSON file with the parameter grid (default: built-in grid)")
+    parser.add_argument("--cv", type=int, default=5, help="Cross-validation folds (default: 5)")
+    parser.add_argument("--trials", default=TRIALS_PATH,
+                        help=f"Checkpoint file for resuming (default: {TRIALS_PATH})")
+    parser.add_argument("--r2-tolerance", type=float, default=0.005,
+                        help="Pick the cheapest model within this R² of the best (default: 0.005)")
+    parser.add_argument("--max-latency-ms", type=float, help="Reject models slower than this per single row")
+    parser.add_argument("--max-size-mb", type=float, help="Reject models larger than this")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Grow the current forest on records added since the last training run")
+    parser.add_argument("--new-trees", type=int, default=20, help="Trees to add in incremental mode (default: 20)")
+    parser.add_argument("--retire-trees", type=int, default=0,
+                        help="Oldest trees to drop in incremental mode (default: 0)")
+    args = parser.parse_args()
+
+    # Load dataset (typed binary copy, rebuilt from merged_dataset.csv when stale)
+    df = load_dataset()
 
-# Evaluate model
-train_score = model.score(X_train, y_train)
-test_score = model.score(X_test, y_test)
+    if args.incremental:
+        model_path, state = incremental_base()
+        if state is None:
+            parser.error("no training state found; run a full training first")
+        try:
+            model, metrics = train_incremental(args, df, model_path, state)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        model, metrics = train_full(args, df)
 
-print(f"Training R² Score: {train_score:.4f}")
-print(f"Testing R² Score: {test_score:.4f}")
+    if model is not None:
+        save_artifacts(model, df, metrics)
 
-# Save model (no encoders needed as all features are already numeric)
-joblib.dump(model, "model.pkl")
 
-print("\nModel saved successfully!")
+if __name__ == "__main__":
+    main()
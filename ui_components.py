@@ -0,0 +1,84 @@
+import streamlit as st
+
+from instrumentation import is_admin, timings
+from prediction_service import current_service
+
+# Widgets shared by the English (app.py) and Kurdish (pages/Kurdish.py) forms.
+# Labels are passed in so each page keeps its own language.
+
+
+def show_attributions(explanation, labels):
+    # One bar per feature: how far it moved this prediction away from the average one
+    with st.expander(labels["title"], expanded=True):
+        st.caption(labels["caption"].format(bias=explanation["bias"]))
+        st.vega_lite_chart(explanation["contributions"], {
+            "mark": "bar",
+            "encoding": {
+                "y": {"field": "feature", "type": "nominal", "sort": None, "title": None},
+                "x": {"field": "contribution", "type": "quantitative", "title": labels["axis"]},
+                "color": {"condition": {"test": "datum.contribution > 0", "value": "#22c55e"}, "value": "#ef4444"},
+                "tooltip": [{"field": "feature"}, {"field": "contribution", "format": "+.2f"}],
+            },
+        }, use_container_width=True)
+
+
+def show_what_if(service, user_data, labels):
+    # Score curves for each feature and a grid for selected pairs, all from one batched prediction
+    import pandas as pd
+
+    from sensitivity import best_changes, sweep
+
+    result = sweep(service, user_data)
+    st.markdown(labels["title"])
+    st.caption(labels["caption"])
+    st.dataframe(best_changes(result), use_container_width=True, hide_index=True)
+
+    tabs = st.tabs(list(result["curves"]))
+    for tab, (col, curve) in zip(tabs, result["curves"].items()):
+        with tab:
+            st.line_chart(pd.DataFrame({labels["score"]: curve["scores"]}, index=pd.Index(curve["values"], name=col)))
+            st.caption(labels["current"].format(value=curve["current"]))
+
+    for pair in result["pairs"]:
+        a, b = pair["features"]
+        cells = [
+            {a: x, b: y, labels["score"]: score}
+            for x, row in zip(pair["x"], pair["scores"])
+            for y, score in zip(pair["y"], row)
+        ]
+        st.vega_lite_chart(cells, {
+            "mark": "rect",
+            "encoding": {
+                "x": {"field": a, "type": "ordinal"},
+                "y": {"field": b, "type": "ordinal", "sort": "descending"},
+                "color": {"field": labels["score"], "type": "quantitative", "scale": {"scheme": "viridis"}},
+                "tooltip": [{"field": a}, {"field": b}, {"field": labels["score"]}],
+            },
+        }, use_container_width=True)
+
+
+def show_sidebar_panels():
+    # Prediction cache counters (hits, misses, evictions)
+    with st.sidebar.expander("⚙️ Prediction cache"):
+        service = current_service()
+        if service is None:
+            st.caption("Model is still loading.")
+        else:
+            if service.version is not None:
+                st.caption(f"Model version: v{service.version:04d}")
+            st.json(service.cache.stats())
+
+    # Per-stage timings across all sessions, only shown with ?admin=<APP_ADMIN_TOKEN>
+    if is_admin(st.query_params.get("admin")):
+        with st.sidebar.expander("⏱️ Stage timings"):
+            timings.set_enabled(st.checkbox("Record timings", value=timings.enabled, key="record_timings"))
+            snapshot = timings.snapshot()
+            if snapshot:
+                st.dataframe([{"stage": stage, **stats} for stage, stats in snapshot.items()], use_container_width=True)
+            else:
+                st.caption("No timings recorded yet.")
+            dump = timings.text_dump()
+            st.code(dump, language="text")
+            st.download_button("Download metrics", dump, file_name="stage_timings.txt")
+            if st.button("Reset timings", key="reset_timings"):
+                timings.reset()